@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: offline benchmark of the scrapers
+# (Portuguese below)
+#
+# This script measures how long each stage of the two scrapers takes without touching live Wikipedia. Snapshots of the 25 season pages, the MediaWiki API responses for their Histórico sections, the list of participants and the census names are saved once into benchmarks/fixtures and then served by a local HTTP server, so every run sees exactly the same input. For every stage (fetch, HTML parse, pd.read_html, accent normalisation, divider split, transpose/dedupe, derivations, typing, write) it reports the median time over the repetitions and the peak memory allocated (every repetition starts in an empty directory and always writes Parquet and CSV, whatever BBB_OUTPUT_FORMATS says), and saves the results as JSON named after the current commit so runs can be compared across commits.
+#
+#     python BBB_Benchmark.py record                      # save the fixtures from Wikipedia (needs network)
+#     python BBB_Benchmark.py run [--repeat 5]            # run offline and save benchmarks/results/<commit>.json
+#     python BBB_Benchmark.py run --compare old.json      # also print the change against an earlier result
+#
+# Script: benchmark offline dos scrapers
+# Este script mede quanto tempo cada etapa dos dois scrapers leva sem acessar a Wikipedia. Cópias das 25 páginas das edições, das respostas da API do MediaWiki para as suas seções Histórico, da lista de participantes e dos nomes do censo são salvas uma vez em benchmarks/fixtures e depois servidas por um servidor HTTP local, então toda execução vê exatamente a mesma entrada. Para cada etapa (download, parse do HTML, pd.read_html, remoção de acentos, divisão nas linhas vazias, transposição/remoção de duplicadas, colunas derivadas, conversão de tipos, gravação) ele mostra o tempo mediano entre as repetições e o pico de memória alocada (cada repetição começa num diretório vazio e sempre grava Parquet e CSV, independente de BBB_OUTPUT_FORMATS), e salva os resultados em JSON com o nome do commit atual para comparar execuções entre commits.
+
+# Libraries
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import pandas as pd
+
+import BBB_Nominations_scrape as nominations
+import BBB_Participants_scrape as participants
+from BBB_Fetch import Fetcher, get_fetcher
+from BBB_Gender_index import SOURCE_URL, GenderIndex, build_index
+from BBB_Sections import SECTION_TITLE, fetch_section_html
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+CENSUS_FIXTURE = "nomes.csv"
+
+# Formats written by the write stage: fixed, so the timings don't depend on BBB_OUTPUT_FORMATS
+BENCHMARK_FORMATS = ["parquet", "csv"]
+
+
+# Fixture file of a page: https://pt.wikipedia.org/wiki/Big_Brother_Brasil_1 -> Big_Brother_Brasil_1.html.gz
+def fixture_name(url):
+    return unquote(urlsplit(url).path.rsplit("/", 1)[-1])
+
+
+# Fixture file of a MediaWiki API request: api_<hash of its sorted parameters>.json.gz
+def api_fixture_name(url):
+    query = "&".join(sorted(urlsplit(url).query.split("&")))
+    return f"api_{hashlib.sha256(query.encode('utf-8')).hexdigest()[:16]}.json"
+
+
+# Fetcher that also saves every API response it gets as a fixture
+class RecordingFetcher:
+    def __init__(self, fetcher, fixtures_dir):
+        self.fetcher = fetcher
+        self.fixtures_dir = fixtures_dir
+
+    def get(self, url):
+        response = self.fetcher.get(url)
+        with gzip.open(os.path.join(self.fixtures_dir, api_fixture_name(url) + ".gz"), "wb") as f:
+            f.write(response.content)
+        return response
+
+
+# Saves the live pages and the API responses of the section-only source into the fixtures directory
+# (the only command that needs network access)
+def record(fixtures_dir=FIXTURES_DIR):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    fetcher = get_fetcher()
+    for url in nominations.urls + [participants.url, SOURCE_URL]:
+        name = fixture_name(url)
+        if not name.endswith(".csv"):
+            name += ".html"
+        with gzip.open(os.path.join(fixtures_dir, name + ".gz"), "wb") as f:
+            f.write(fetcher.get(url).content)
+        print(f"Saved {name}")
+
+    recorder = RecordingFetcher(fetcher, fixtures_dir)
+    for url in nominations.urls:
+        fetch_section_html(url, recorder)
+        print(f"Saved the {SECTION_TITLE} section of {fixture_name(url)}")
+
+
+def has_api_fixtures(fixtures_dir=FIXTURES_DIR):
+    return any(name.startswith("api_") for name in os.listdir(fixtures_dir))
+
+
+# Local HTTP server answering /wiki/<page>, /nomes.csv and /w/api.php?<recorded request> from the fixtures
+def start_stub_server(fixtures_dir=FIXTURES_DIR):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if urlsplit(self.path).path == "/w/api.php":
+                name = api_fixture_name(self.path)
+            else:
+                name = fixture_name(self.path)
+            path = os.path.join(fixtures_dir, name + (".gz" if name.endswith((".csv", ".json")) else ".html.gz"))
+            if not os.path.exists(path):
+                self.send_error(404)
+                return
+            with gzip.open(path, "rb") as f:
+                body = f.read()
+            content_types = {".csv": "text/csv", ".json": "application/json; charset=utf-8"}
+            self.send_response(200)
+            self.send_header("Content-Type", content_types.get(os.path.splitext(name)[1], "text/html; charset=UTF-8"))
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class StageTimer:
+    """Adds up the time (and, when tracing memory, the peak allocation) of each named stage."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.seconds = {}
+        self.peak_bytes = {}
+
+    def __call__(self, stage, function, *args):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = function(*args)
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - start
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - before
+            self.peak_bytes[stage] = max(self.peak_bytes.get(stage, 0), peak)
+        return result
+
+
+# Stages of nominations_scrape after the Histórico table was found
+def bench_season_table(desired_table, year, timer):
+    raw = timer("read_html", nominations.read_table, desired_table)
+    raw = timer("accent_normalisation", nominations.normalise_table, raw)
+    split = timer("divider_split", nominations.split_sections, raw)
+    tables = timer("transpose_dedupe", nominations.reshape_sections, split, year)
+    timer("write", nominations.save_tables, tables, year, BENCHMARK_FORMATS)
+
+
+# One pass over all season pages, stage by stage as in nominations_scrape with the full page
+def bench_nominations(base_url, fetcher, timer):
+    for url in nominations.urls:
+        local_url = f"{base_url}/wiki/{fixture_name(url)}"
+        year = url.rsplit('_', 1)[-1]
+        response = timer("fetch", fetcher.get, local_url)
+        desired_table = timer("html_parse", nominations.extract_historico_table, response.text)
+        bench_season_table(desired_table, year, timer)
+
+
+# The same pass getting only the Histórico sections from the recorded MediaWiki API responses
+def bench_nominations_api(base_url, fetcher, timer):
+    for url in nominations.urls:
+        year = url.rsplit('_', 1)[-1]
+        section_html = timer("fetch", fetch_section_html, url, fetcher, None, SECTION_TITLE, f"{base_url}/w/api.php")
+        desired_table = timer("html_parse", nominations.extract_section_table, section_html)
+        bench_season_table(desired_table, year, timer)
+
+
+# One pass over the list of participants, stage by stage as in contestants_scrape
+def bench_participants(base_url, fetcher, timer, gender_index):
+    response = timer("fetch", fetcher.get, f"{base_url}/wiki/{fixture_name(participants.url)}")
+    contestants = timer("html_parse", participants.parse_season_tables, response.content)
+    contestants = timer("derivations", participants.derive_columns, contestants, gender_index)
+    contestants = timer("normalisation", participants.normalise_columns, contestants)
+    contestants = timer("schema", participants.apply_schema, contestants)
+    timer("write", participants.save_contestants, contestants, BENCHMARK_FORMATS)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Starts a repetition in an empty directory, so every repetition writes its outputs from scratch
+def reset_workdir(workdir):
+    outputs = os.path.join(workdir, "outputs")
+    shutil.rmtree(outputs, ignore_errors=True)
+    os.makedirs(outputs)
+    os.chdir(outputs)
+
+
+def run(repeat=3, fixtures_dir=FIXTURES_DIR):
+    server, base_url = start_stub_server(fixtures_dir)
+    fetcher = Fetcher(cache=None, offline=False)
+    workdir = tempfile.mkdtemp(prefix="bbb_benchmark_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        gender_index = GenderIndex(os.path.join(workdir, "nomes.sqlite"), source=f"{base_url}/{CENSUS_FIXTURE}")
+        build_index(gender_index.source, gender_index.index_path)
+
+        benches = {
+            "nominations": lambda timer: bench_nominations(base_url, fetcher, timer),
+            "participants": lambda timer: bench_participants(base_url, fetcher, timer, gender_index),
+        }
+        if has_api_fixtures(fixtures_dir):
+            benches["nominations_api"] = lambda timer: bench_nominations_api(base_url, fetcher, timer)
+        results = {}
+        for name, bench in benches.items():
+            # Timed repetitions without memory tracing (tracemalloc slows everything down)
+            runs = []
+            for _ in range(repeat):
+                reset_workdir(workdir)
+                timer = StageTimer()
+                bench(timer)
+                runs.append(timer.seconds)
+
+            # One extra pass to measure the peak memory of each stage
+            reset_workdir(workdir)
+            tracemalloc.start()
+            memory = StageTimer(trace_memory=True)
+            bench(memory)
+            tracemalloc.stop()
+
+            results[name] = {
+                stage: {
+                    "median_seconds": statistics.median(r[stage] for r in runs),
+                    "min_seconds": min(r[stage] for r in runs),
+                    "peak_mib": memory.peak_bytes[stage] / 2 ** 20,
+                }
+                for stage in runs[0]
+            }
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        fetcher.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results,
+    }
+
+
+# Prints the results as a table, with the ratio to an earlier result when given
+def report(record, previous=None):
+    rows = []
+    for pipeline, stages in record["results"].items():
+        for stage, values in stages.items():
+            row = {"pipeline": pipeline, "stage": stage, "median_s": values["median_seconds"], "peak_mib": values["peak_mib"]}
+            if previous is not None:
+                before = previous["results"].get(pipeline, {}).get(stage)
+                row["vs_" + str(previous.get("commit"))] = values["median_seconds"] / before["median_seconds"] if before and before["median_seconds"] else None
+            rows.append(row)
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of the BBB scrapers")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("record", help="save the fixtures from live Wikipedia")
+    run_parser = subcommands.add_parser("run", help="run the benchmark against the fixtures")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", help="JSON file for the results (default benchmarks/results/<commit>.json)")
+    run_parser.add_argument("--compare", help="earlier results JSON to compare with")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.fixtures)
+    else:
+        result = run(args.repeat, args.fixtures)
+        output = args.output or os.path.join(RESULTS_DIR, f"{result['commit'] or 'working-tree'}.json")
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+        previous = None
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                previous = json.load(f)
+        report(result, previous)
+        print(f"Results saved to {output}")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: stable participant IDs and change sets for incremental loads
+# (Portuguese below)
+#
+# ID_Participante used to be the position of each name in the scraped list, so a contestant added or moved on the Wikipedia page renumbered everyone after them and the warehouse had to reload every table. The ID registry is a small JSON file mapping each contestant's name (accent-free, lowercase) to the ID it got the first time it was seen: known contestants keep their IDs and new ones get the next free number. The IDs follow the normalised names, so names that differ only by accents, case or spacing ('Thaís Braz', 'Thais  Braz') share one ID where the old numbering gave each spelling its own; otherwise the IDs of the first run are the same as before.
+#
+# With the 'changes' output format, every table written by the scrapers is also compared season by season with the snapshot of the previous run, and the differences are saved as a change set: one Parquet file per table, season and run (changesets/<Table>/Edicao=<n>/<run>.parquet) with the rows inserted, updated or deleted (Operacao) and their keys (ID_Participante and Edicao for the contestants, Edicao, Semana and Linha for the weekly tables). Loads downstream become small merges of these files instead of full reloads.
+#
+# Script: IDs estáveis dos participantes e conjuntos de mudanças para cargas incrementais
+# O ID_Participante era a posição de cada nome na lista extraída, então um participante adicionado ou movido na página da Wikipedia renumerava todos os seguintes e o data warehouse precisava recarregar todas as tabelas. O registro de IDs é um pequeno arquivo JSON que liga o nome de cada participante (sem acentos, em minúsculas) ao ID que ele recebeu na primeira vez em que apareceu: participantes conhecidos mantêm os seus IDs e os novos recebem o próximo número livre. Os IDs seguem os nomes normalizados, então nomes que só diferem por acentos, maiúsculas ou espaços ('Thaís Braz', 'Thais  Braz') compartilham um ID, enquanto a numeração antiga dava um ID a cada grafia; fora isso, os IDs da primeira execução são os mesmos de antes.
+#
+# Com o formato de saída 'changes', cada tabela gravada pelos scrapers também é comparada, edição por edição, com o retrato da execução anterior, e as diferenças são salvas como um conjunto de mudanças: um arquivo Parquet por tabela, edição e execução (changesets/<Tabela>/Edicao=<n>/<execução>.parquet) com as linhas inseridas, alteradas ou removidas (Operacao) e as suas chaves (ID_Participante e Edicao para os participantes, Edicao, Semana e Linha para as tabelas semanais). As cargas seguintes viram pequenas junções desses arquivos em vez de recargas completas.
+
+# Libraries
+
+import glob
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+from unidecode import unidecode
+
+from BBB_Metrics import metrics
+
+DEFAULT_REGISTRY_PATH = os.environ.get("BBB_ID_REGISTRY", "participant_ids.json")
+DEFAULT_SNAPSHOT_DIR = os.environ.get("BBB_SNAPSHOT_DIR", ".snapshots")
+DEFAULT_CHANGESETS_DIR = os.environ.get("BBB_CHANGESETS_DIR", "changesets")
+
+# Columns identifying a row of each table. Rows with the same key (two nominees in a week) are told apart by Ocorrencia.
+WEEKLY_KEYS = ["Edicao", "Semana", "Linha"]
+CHANGE_KEYS = {
+    "Contestants": ["Edicao", "ID_Participante"],
+    "Name_links": ["Edicao", "Nome"],
+}
+
+
+# Key of a name in the registry: 'João  Silva' and 'Joao Silva' are the same person and get the same ID
+def registry_key(name):
+    return " ".join(unidecode(name).lower().split())
+
+
+class IdRegistry:
+    """Persistent {name: ID_Participante} map. IDs are never reused or renumbered."""
+
+    def __init__(self, path=DEFAULT_REGISTRY_PATH, ids=None, next_id=1):
+        self.path = path
+        self.ids = ids or {}
+        self.next_id = next_id
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=DEFAULT_REGISTRY_PATH):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        return cls(path, data.get("ids", {}), data.get("next_id", 1))
+
+    # Returns the IDs of a Series of names, giving new names the next IDs in the order they first appear
+    def assign(self, names):
+        mapping = {}
+        with self._lock:
+            for name in names.dropna().unique():
+                key = registry_key(name)
+                if key not in self.ids:
+                    self.ids[key] = self.next_id
+                    self.next_id += 1
+                mapping[name] = self.ids[key]
+        return names.map(mapping)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            data = {"next_id": self.next_id, "ids": self.ids}
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+
+
+# Adds the Ocorrencia column that makes the keys unique
+def with_occurrence(df, keys):
+    df = df.reset_index(drop=True)
+    df["Ocorrencia"] = df.groupby(keys, dropna=False, sort=False).cumcount().astype("int16")
+    return df
+
+
+# Function that compares two snapshots of a table and returns the inserted, updated and deleted rows (column Operacao).
+# Rows are compared by a hash of their values written as text, so types that changed representation (e.g. the unit
+# of a date after a Parquet round trip) don't show up as updates.
+def diff_snapshots(previous, current, keys):
+    value_columns = [column for column in current.columns if column not in keys]
+
+    def row_hashes(df):
+        hashes = pd.util.hash_pandas_object(df.reindex(columns=value_columns).astype("string"), index=False)
+        return df[keys].assign(_hash=hashes.to_numpy())
+
+    compared = row_hashes(previous).merge(row_hashes(current), on=keys, how="outer", suffixes=("_before", "_after"), indicator=True)
+    inserted = compared.loc[compared["_merge"] == "right_only", keys]
+    deleted = compared.loc[compared["_merge"] == "left_only", keys]
+    updated = compared.loc[(compared["_merge"] == "both") & (compared["_hash_before"] != compared["_hash_after"]), keys]
+
+    return pd.concat([
+        current.merge(inserted, on=keys).assign(Operacao="insert"),
+        current.merge(updated, on=keys).assign(Operacao="update"),
+        previous.merge(deleted, on=keys).assign(Operacao="delete"),
+    ], ignore_index=True)
+
+
+def snapshot_path(name, edicao, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    return os.path.join(snapshot_dir, name, f"Edicao={int(edicao)}.parquet")
+
+
+# Function that saves the change set of a table against the previous run's snapshot, season by season, and moves the snapshot forward.
+# Seasons not in the table are left alone, unless replace=True, in which case their rows are reported as deleted.
+def write_changes(name, df, replace=False, snapshot_dir=DEFAULT_SNAPSHOT_DIR, changesets_dir=DEFAULT_CHANGESETS_DIR):
+    keys = CHANGE_KEYS.get(name, WEEKLY_KEYS) + ["Ocorrencia"]
+    current = with_occurrence(df, keys[:-1])
+    current["Edicao"] = current["Edicao"].astype("int16")
+    seasons = set(current["Edicao"].unique())
+    if replace:
+        for path in glob.glob(os.path.join(snapshot_dir, name, "Edicao=*.parquet")):
+            seasons.add(int(os.path.basename(path)[len("Edicao="):-len(".parquet")]))
+
+    run = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + f"_{metrics.run_id[:8]}"
+    paths = []
+    for edicao in sorted(seasons):
+        path = snapshot_path(name, edicao, snapshot_dir)
+        previous = pd.read_parquet(path) if os.path.exists(path) else current.iloc[0:0]
+        season = current[current["Edicao"] == edicao]
+
+        changes = diff_snapshots(previous, season, keys)
+        for operation, count in changes["Operacao"].value_counts().items():
+            metrics.count("changed_rows", int(count), table=name, operation=operation)
+        if len(changes):
+            paths.append(os.path.join(changesets_dir, name, f"Edicao={int(edicao)}", f"{run}.parquet"))
+            os.makedirs(os.path.dirname(paths[-1]), exist_ok=True)
+            changes.to_parquet(paths[-1], index=False)
+
+        # The snapshot only moves forward once the change set is on disk (and is left as it is when nothing changed)
+        if len(season):
+            if len(changes) or not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                season.to_parquet(path + ".tmp", index=False)
+                os.replace(path + ".tmp", path)
+        elif os.path.exists(path):
+            os.remove(path)
+    return paths
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: shared HTTP helpers for the Wikipedia scrapers
+# (Portuguese below)
+#
+# Both scrapers download pages from pt.wikipedia.org. This module keeps one pooled keep-alive session for all of them, caps how many requests hit the same host at once and runs a scrape function over many URLs concurrently, collecting a per-URL summary instead of printing and moving on.
+#
+# Pages are kept in a gzip-compressed cache on disk. On the next run they are revalidated with a conditional GET (ETag / Last-Modified), so a page that hasn't changed costs a 304 instead of a full download. In offline mode pages are only replayed from the cache.
+#
+# Script: funções HTTP compartilhadas pelos scrapers da Wikipedia
+# Os dois scrapers baixam páginas da pt.wikipedia.org. Este módulo mantém uma única sessão com conexões reaproveitadas, limita quantas requisições vão ao mesmo host ao mesmo tempo e executa uma função de scrape sobre várias URLs em paralelo, juntando um resumo por URL em vez de só imprimir e seguir em frente.
+#
+# As páginas ficam num cache comprimido com gzip no disco. Na execução seguinte elas são revalidadas com um GET condicional (ETag / Last-Modified), então uma página que não mudou custa um 304 em vez de um download completo. No modo offline as páginas vêm apenas do cache.
+
+# Libraries
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from BBB_Metrics import metrics
+
+# Wikipedia asks bots to identify themselves with a descriptive User-Agent
+USER_AGENT = "BigBrotherBrasil_Kestra/1.0 (https://github.com/andrea-leonel/BigBrotherBrasil_Kestra)"
+
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_TIMEOUT = 30
+
+# The cache can be moved or switched to offline mode from the Kestra task without touching the code
+DEFAULT_CACHE_DIR = os.environ.get("BBB_CACHE_DIR", ".cache/wikipedia")
+DEFAULT_OFFLINE = os.environ.get("BBB_OFFLINE", "0").lower() in ("1", "true", "yes")
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+# Function that creates a requests session whose connection pool is large enough for all the workers,
+# so every request after the first one to a host reuses an open keep-alive connection (no new TLS handshake)
+def make_session(pool_size=DEFAULT_WORKERS):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+class ResponseCache:
+    """On-disk cache of response bodies keyed by URL. Each entry is a gzip body plus a small JSON metadata file."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".html.gz"
+
+    def load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with gzip.open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "encoding": response.encoding,
+            "fetched_at": time.time(),
+        }
+        # Write to temporary files first so a crash or a concurrent reader never sees half an entry
+        with gzip.open(body_path + ".tmp", "wb") as f:
+            f.write(response.content)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(body_path + ".tmp", body_path)
+        os.replace(meta_path + ".tmp", meta_path)
+        return meta
+
+    # Rebuilds a requests.Response from a cache entry so callers can use .text / .content as usual
+    @staticmethod
+    def to_response(url, meta, body):
+        response = requests.Response()
+        response.url = url
+        response.status_code = 200
+        response._content = body
+        response.encoding = meta.get("encoding")
+        response.headers = CaseInsensitiveDict()
+        if meta.get("content_type"):
+            response.headers["Content-Type"] = meta["content_type"]
+        if meta.get("etag"):
+            response.headers["ETag"] = meta["etag"]
+        if meta.get("last_modified"):
+            response.headers["Last-Modified"] = meta["last_modified"]
+        response.from_cache = True
+        return response
+
+
+class Fetcher:
+    """Pooled session plus a semaphore per host limiting concurrent requests to that host.
+
+    With a cache, cached pages are revalidated with a conditional GET; in offline mode they are only read from disk.
+    """
+
+    def __init__(self, session=None, max_per_host=DEFAULT_MAX_PER_HOST, timeout=DEFAULT_TIMEOUT,
+                 cache=None, offline=DEFAULT_OFFLINE):
+        self.session = session if session is not None else make_session()
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.cache = cache
+        self.offline = offline
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    # One semaphore per host, created on first use
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        cached = self.cache.load(url) if self.cache is not None else None
+
+        if self.offline:
+            if cached is None:
+                raise CacheMiss(f"{url} is not in the cache and offline mode is on")
+            metrics.count("cache_hits")
+            return ResponseCache.to_response(url, *cached)
+
+        # Conditional GET: the server answers 304 Not Modified when the cached copy is still current
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached is not None:
+            meta = cached[0]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self._host_limit(url):
+            response = self.session.get(url, headers=headers, **kwargs)
+        metrics.count("requests")
+
+        if response.status_code == 304 and cached is not None:
+            metrics.count("cache_hits")
+            return ResponseCache.to_response(url, *cached)
+
+        response.raise_for_status()
+        response.from_cache = False
+        metrics.count("bytes_fetched", len(response.content))
+        if self.cache is not None:
+            self.cache.store(url, response)
+        return response
+
+    # Sizes the connection pool for this many concurrent requests (urllib3 discards connections beyond the pool size)
+    def set_pool_size(self, pool_size):
+        self.session.get_adapter("https://").close()
+        self.session.get_adapter("http://").close()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+
+# Fetcher shared by every scrape in this process when the caller doesn't pass one
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher():
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher(cache=ResponseCache())
+        return _default_fetcher
+
+
+# Function that runs scrape(url) for every url with a pool of worker threads.
+# Each url gets an entry in the summary with its status, duration and either the returned value or the error.
+def run_concurrently(scrape, urls, workers=DEFAULT_WORKERS):
+    summary = {}
+
+    def timed(url):
+        start = time.perf_counter()
+        try:
+            result = scrape(url)
+        except Exception as e:
+            return {"url": url, "status": "error", "error": f"{type(e).__name__}: {e}",
+                    "seconds": time.perf_counter() - start}
+        return {"url": url, "status": "ok", "result": result, "seconds": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(timed, url) for url in urls]
+        for future in as_completed(futures):
+            outcome = future.result()
+            summary[outcome["url"]] = outcome
+
+    # Keep the summary in the same order as the input urls
+    return {url: summary[url] for url in urls}
+
+
+# Function that prints a short report of a run_concurrently summary
+def print_summary(summary):
+    failed = [s for s in summary.values() if s["status"] == "error"]
+    print(f"{len(summary) - len(failed)} of {len(summary)} pages processed successfully")
+    for s in failed:
+        print(f"Error processing {s['url']}: {s['error']}")
+    return failed
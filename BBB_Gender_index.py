@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: local index of the census first-name genders
+# (Portuguese below)
+#
+# The contestants script classifies gender from the first name using a table of names from the Brazilian Census (nomes.csv). Instead of downloading and parsing the whole CSV on every run, this script builds it once into a small SQLite file keyed by the normalised first name (uppercase, no accents). The file records the schema version and a hash of the CSV it was built from, is opened lazily and is queried only for the distinct names we need. Both scrapers can use it.
+#
+# Build or refresh the index with:
+#     python BBB_Gender_index.py [--source nomes.csv] [--index nomes.sqlite]
+#
+# Script: índice local dos gêneros dos primeiros nomes do censo
+# O script de participantes classifica o gênero pelo primeiro nome usando uma tabela de nomes do Censo (nomes.csv). Em vez de baixar e ler o CSV inteiro a cada execução, este script o transforma uma vez num pequeno arquivo SQLite indexado pelo primeiro nome normalizado (maiúsculo, sem acentos). O arquivo registra a versão do esquema e um hash do CSV de origem, é aberto apenas quando necessário e consultado só para os nomes distintos que precisamos. Os dois scrapers podem usá-lo.
+
+# Libraries
+
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+
+from unidecode import unidecode
+
+from BBB_Fetch import get_fetcher
+
+SOURCE_URL = 'https://raw.githubusercontent.com/andrea-leonel/BigBrotherBrasil_Kestra/refs/heads/main/nomes.csv'
+DEFAULT_INDEX_PATH = os.environ.get("BBB_GENDER_INDEX", "nomes.sqlite")
+
+# Bump when the table layout changes so old files are rebuilt instead of misread
+SCHEMA_VERSION = 1
+
+# SQLite limits the number of parameters per statement, so bulk lookups are sent in chunks
+LOOKUP_CHUNK = 500
+
+
+# Function that turns a name into the key used by the census table: first word, no accents, uppercase
+def normalise_first_name(name):
+    if not isinstance(name, str) or not name.split():
+        return None
+    return unidecode(name.split()[0]).upper()
+
+
+# Function that reads the census CSV from a local path (plain or .gz) or, by default, from GitHub
+def read_source(source=SOURCE_URL):
+    if source.startswith(("http://", "https://")):
+        return get_fetcher().get(source).content
+    if source.endswith(".gz"):
+        with gzip.open(source, "rb") as f:
+            return f.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+# Function that builds the SQLite index from the census CSV
+def build_index(source=SOURCE_URL, index_path=DEFAULT_INDEX_PATH):
+    raw = read_source(source)
+    reader = csv.DictReader(io.StringIO(raw.decode("utf-8")))
+    rows = {}
+    for row in reader:
+        key = normalise_first_name(row["first_name"])
+        if key and key not in rows:
+            rows[key] = row["classification"]
+
+    # Build next to the final file and swap it in, so readers never see a half-built index
+    tmp_path = index_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    with conn:
+        conn.execute("CREATE TABLE names (first_name TEXT PRIMARY KEY, classification TEXT NOT NULL) WITHOUT ROWID")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.executemany("INSERT INTO names VALUES (?, ?)", sorted(rows.items()))
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("schema_version", str(SCHEMA_VERSION)),
+            ("source", source),
+            ("source_sha256", hashlib.sha256(raw).hexdigest()),
+            ("rows", str(len(rows))),
+            ("built_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+        ])
+    conn.close()
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+class GenderIndex:
+    """Read-only access to the census index. The file is opened (and built if missing or outdated) on first lookup."""
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH, source=SOURCE_URL):
+        self.index_path = index_path
+        self.source = source
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _schema_version(self):
+        try:
+            conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return int(row[0]) if row else None
+
+    def _connection(self):
+        with self._lock:
+            if self._conn is None:
+                if not os.path.exists(self.index_path) or self._schema_version() != SCHEMA_VERSION:
+                    try:
+                        build_index(self.source, self.index_path)
+                    except Exception as e:
+                        raise RuntimeError(f"Could not build the census name index from {self.source}: {e}") from e
+                self._conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+            return self._conn
+
+    def metadata(self):
+        return dict(self._connection().execute("SELECT key, value FROM meta"))
+
+    # Looks up many normalised first names at once and returns {first_name: classification} for the ones found
+    def lookup(self, first_names):
+        keys = sorted({name for name in first_names if isinstance(name, str)})
+        conn = self._connection()
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[start:start + LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(conn.execute(
+                    f"SELECT first_name, classification FROM names WHERE first_name IN ({placeholders})", chunk))
+        return found
+
+    # Maps a Series of normalised first names to their census gender (NaN when the name isn't in the census)
+    def genders(self, first_names):
+        return first_names.map(self.lookup(first_names.dropna().unique()))
+
+    # Maps a Series of full names or nicknames to their census gender
+    def genders_of_names(self, names):
+        first_names = names.map({name: normalise_first_name(name) for name in names.dropna().unique()})
+        return self.genders(first_names)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local index of the census first-name genders")
+    parser.add_argument("--source", default=SOURCE_URL, help="nomes.csv path or URL")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="SQLite file to write")
+    args = parser.parse_args()
+
+    build_index(args.source, args.index)
+    print(f"Census name index saved to {args.index}: {GenderIndex(args.index).metadata()}")
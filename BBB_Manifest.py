@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: manifest of scraped pages for incremental refreshes
+# (Portuguese below)
+#
+# Only the ongoing season's page changes between runs, but every run used to rebuild all seasons. The manifest records, for each Wikipedia page, the revision ID it was scraped at, a hash of the page content and a hash of each output file it produced. Before scraping, the current revision IDs of all pages are fetched in one batched MediaWiki API request, and only pages whose revision changed (or whose outputs are missing or were modified) are scraped again.
+#
+# Script: manifesto das páginas extraídas para atualizações incrementais
+# Só a página da temporada em andamento muda entre execuções, mas toda execução reconstruía todas as temporadas. O manifesto registra, para cada página da Wikipedia, o ID da revisão extraída, um hash do conteúdo da página e um hash de cada arquivo gerado por ela. Antes de extrair, os IDs de revisão atuais de todas as páginas são buscados numa única requisição em lote à API do MediaWiki, e só as páginas cuja revisão mudou (ou cujos arquivos sumiram ou foram alterados) são extraídas de novo.
+
+# Libraries
+
+import hashlib
+import json
+import os
+import time
+from urllib.parse import unquote, urlencode, urlsplit
+
+from BBB_Fetch import get_fetcher
+
+API_URL = "https://pt.wikipedia.org/w/api.php"
+DEFAULT_MANIFEST_DIR = os.environ.get("BBB_MANIFEST_DIR", ".manifest")
+
+# The API accepts up to 50 titles per query for regular clients
+TITLES_PER_REQUEST = 50
+
+
+# Function that turns https://pt.wikipedia.org/wiki/Big_Brother_Brasil_1 into the page title Big Brother Brasil 1
+def title_from_url(url):
+    return unquote(urlsplit(url).path.split("/wiki/", 1)[-1]).replace("_", " ")
+
+
+# Function that builds a MediaWiki API URL (parameters in the URL itself so the page cache keys on them)
+def api_url(params, api=API_URL):
+    return f"{api}?{urlencode(sorted({'format': 'json', 'formatversion': '2', **params}.items()))}"
+
+
+# Function that returns {url: latest revision ID} for many pages using one API request per 50 titles
+def fetch_revisions(urls, fetcher=None, api=API_URL):
+    fetcher = fetcher or get_fetcher()
+    titles = {title_from_url(url): url for url in urls}
+    revisions = {}
+    names = list(titles)
+    for start in range(0, len(names), TITLES_PER_REQUEST):
+        batch = names[start:start + TITLES_PER_REQUEST]
+        data = fetcher.get(api_url({"action": "query", "prop": "info", "redirects": "1",
+                                    "titles": "|".join(batch)}, api)).json()
+        query = data.get("query", {})
+
+        # Redirected or normalised titles come back under their new name, so map them back to the requested one
+        renamed = {}
+        for step in query.get("normalized", []) + query.get("redirects", []):
+            renamed[step["to"]] = renamed.get(step["from"], step["from"])
+        for page in query.get("pages", []):
+            title = renamed.get(page.get("title"), page.get("title"))
+            if title in titles and "lastrevid" in page:
+                revisions[titles[title]] = page["lastrevid"]
+    return revisions
+
+
+# Function that hashes a file in blocks
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """JSON record of the revision, content hash and output hashes of every scraped page."""
+
+    def __init__(self, path, pages=None):
+        self.path = path
+        self.pages = pages or {}
+
+    @classmethod
+    def load(cls, name, manifest_dir=DEFAULT_MANIFEST_DIR):
+        path = os.path.join(manifest_dir, f"{name}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(path, json.load(f).get("pages", {}))
+        except (OSError, ValueError):
+            return cls(path)
+
+    # A page must be scraped again when its revision is unknown or changed, or when one of its outputs is gone or was changed
+    def needs_refresh(self, url, revision):
+        entry = self.pages.get(url)
+        if entry is None or revision is None or entry.get("revision") != revision:
+            return True
+        for path, digest in entry.get("outputs", {}).items():
+            if not os.path.exists(path) or file_sha256(path) != digest:
+                return True
+        return False
+
+    def record(self, url, revision, content_sha256, outputs):
+        self.pages[url] = {
+            "revision": revision,
+            "content_sha256": content_sha256,
+            "outputs": {path: file_sha256(path) for path in outputs},
+            "scraped_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"pages": self.pages}, f, indent=2, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
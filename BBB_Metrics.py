@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: run metrics for the scrapers
+# (Portuguese below)
+#
+# A small instrumentation layer shared by both scrapers. Each stage runs inside a timing span and the code counts what it handled (bytes fetched, cache hits, rows per table, dividers found, duplicate columns dropped). Spans and counters carry labels such as the season, so a slow season shows which stage caused it. At the end of a run everything is saved as one JSON record that the Kestra flow can collect, and optionally sent to Kestra as task metrics. A season can also be run under cProfile or tracemalloc (BBB_PROFILE=cprofile|tracemalloc); tracemalloc is process-wide, so use it with a single worker.
+#
+# Script: métricas de execução dos scrapers
+# Uma pequena camada de instrumentação compartilhada pelos dois scrapers. Cada etapa roda dentro de um intervalo cronometrado e o código conta o que processou (bytes baixados, acertos no cache, linhas por tabela, linhas divisórias encontradas, colunas duplicadas removidas). Intervalos e contadores levam rótulos como a edição, então uma edição lenta mostra qual etapa causou a demora. No fim da execução tudo é salvo num único registro JSON que o fluxo do Kestra pode coletar e, opcionalmente, enviado ao Kestra como métricas da tarefa. Uma edição também pode rodar com cProfile ou tracemalloc (BBB_PROFILE=cprofile|tracemalloc); o tracemalloc vale para o processo inteiro, então use-o com um único worker.
+
+# Libraries
+
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_PROFILE = os.environ.get("BBB_PROFILE") or None
+DEFAULT_PROFILE_DIR = os.environ.get("BBB_PROFILE_DIR", "metrics/profiles")
+KESTRA_METRICS = os.environ.get("BBB_KESTRA_METRICS", "0").lower() in ("1", "true", "yes")
+
+# Number of functions / allocation sites kept in the record for each profile
+PROFILE_TOP = 15
+
+# Labels (e.g. season) of the code currently running in this thread
+_current_labels = contextvars.ContextVar("bbb_metric_labels", default={})
+
+
+class Metrics:
+    """Thread-safe collection of timing spans, counters and profiles for one run."""
+
+    def __init__(self, name="run", profile=DEFAULT_PROFILE, profile_dir=DEFAULT_PROFILE_DIR):
+        self.name = name
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.run_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.spans = []
+        self.counters = {}
+        self.profiles = []
+        self._lock = threading.Lock()
+
+    # Everything recorded inside this block gets these labels too
+    @contextmanager
+    def labels(self, **labels):
+        token = _current_labels.set({**_current_labels.get(), **labels})
+        try:
+            yield
+        finally:
+            _current_labels.reset(token)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        labels = {**_current_labels.get(), **labels}
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.spans.append({"stage": stage, "seconds": seconds, "status": status, **labels})
+
+    def count(self, name, value=1, **labels):
+        labels = {**_current_labels.get(), **labels}
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    # Runs the block under cProfile or tracemalloc when profiling is on, keeping the top entries in the record
+    @contextmanager
+    def profiled(self, name):
+        if self.profile not in ("cprofile", "tracemalloc"):
+            yield
+            return
+
+        labels = {**_current_labels.get(), "name": name, "kind": self.profile}
+        if self.profile == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"{self.name}_{name}.prof")
+                profiler.dump_stats(path)
+                text = io.StringIO()
+                pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+                with self._lock:
+                    self.profiles.append({**labels, "path": path, "top": text.getvalue()})
+        else:
+            started_here = not tracemalloc.is_tracing()
+            if started_here:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            try:
+                yield
+            finally:
+                peak = tracemalloc.get_traced_memory()[1]
+                top = tracemalloc.take_snapshot().compare_to(before, "lineno")[:PROFILE_TOP]
+                if started_here:
+                    tracemalloc.stop()
+                with self._lock:
+                    self.profiles.append({**labels, "peak_bytes": peak, "top": [str(stat) for stat in top]})
+
+    # Takes out everything recorded so far. Worker processes use it to send their part of the metrics back with each result
+    def drain(self):
+        with self._lock:
+            drained = {"spans": self.spans, "counters": self.counters, "profiles": self.profiles}
+            self.spans, self.counters, self.profiles = [], {}, []
+        return drained
+
+    # Adds metrics drained in another process to this run
+    def merge(self, drained):
+        with self._lock:
+            self.spans.extend(drained["spans"])
+            for key, value in drained["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.profiles.extend(drained["profiles"])
+
+    def record(self):
+        with self._lock:
+            spans = list(self.spans)
+            counters = [{"name": name, "value": value, **dict(labels)} for (name, labels), value in self.counters.items()]
+            profiles = list(self.profiles)
+
+        # Total time per stage across all seasons, the first thing to look at when a run gets slower
+        totals = {}
+        for span in spans:
+            totals[span["stage"]] = totals.get(span["stage"], 0.0) + span["seconds"]
+
+        return {
+            "name": self.name,
+            "run_id": self.run_id,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+            "wall_seconds": time.time() - self.started_at,
+            "stage_totals": totals,
+            "spans": spans,
+            "counters": counters,
+            "profiles": profiles,
+        }
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.record(), f, indent=2, default=str)
+        os.replace(path + ".tmp", path)
+        return path
+
+    # Sends the counters and stage totals to Kestra, which reads '::{...}::' lines from the task's output
+    def emit_kestra(self):
+        record = self.record()
+        metrics = [{"name": c["name"], "type": "counter", "value": c["value"],
+                    "tags": {k: str(v) for k, v in c.items() if k not in ("name", "value")}}
+                   for c in record["counters"]]
+        metrics += [{"name": f"{stage}_seconds", "type": "timer", "value": seconds, "tags": {"run": self.name}}
+                     for stage, seconds in record["stage_totals"].items()]
+        print("::" + json.dumps({"metrics": metrics}) + "::")
+
+
+# Metrics of the current process, used by the fetcher and both scrapers
+metrics = Metrics()
+
+
+# Names the process metrics after the scraper and sets the profiling mode for this run
+def start_run(name, profile=DEFAULT_PROFILE):
+    metrics.name = name
+    metrics.profile = profile
+    return metrics
+
+
+# Saves the process metrics (and sends them to Kestra when BBB_KESTRA_METRICS=1)
+def finish_run(path=None):
+    path = path or os.environ.get("BBB_METRICS_PATH") or os.path.join("metrics", f"{metrics.name}.json")
+    metrics.save(path)
+    if KESTRA_METRICS:
+        metrics.emit_kestra()
+    return path
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: linking the names in the nominations tables to the contestants
+# (Portuguese below)
+#
+# The nominations tables name people by the nickname used on each season's page (Juliette, Gil, Arthur), while ID_Participante only exists in the contestants table, built from the full name. This script builds an index of the contestants' names per season: the accent-free lowercase name, its words and the character trigrams of each word. Every voter and nominee name of the Nominations, Individual_nominations and Eviction_results datasets (the names in the cells, plus the row labels of Individual_nominations, whose rows are the housemates) is then looked up among the contestants of its own season only, so each name is compared with a couple of dozen people instead of every contestant ever. A name is linked when it is the full name, when all its words belong to a single contestant's name, when its words are the start of words of a single contestant's name (Gil for Gilberto), or failing that when one contestant's name has clearly the most similar words by trigrams (Julliette for Juliette). The links are saved as the Name_links dataset (Edicao, Nome, ID_Participante, Metodo) and the names that couldn't be linked are listed in unresolved_names.csv.
+#
+#     python BBB_Names.py            # after both scrapers wrote their Parquet datasets
+#
+# Script: ligando os nomes das tabelas de paredões aos participantes
+# As tabelas de paredões identificam as pessoas pelo apelido usado na página de cada edição (Juliette, Gil, Arthur), enquanto o ID_Participante só existe na tabela de participantes, criado a partir do nome completo. Este script monta um índice dos nomes dos participantes por edição: o nome sem acentos e em minúsculas, as suas palavras e os trigramas de caracteres de cada palavra. Cada nome de quem votou ou foi indicado nos datasets Nominations, Individual_nominations e Eviction_results (os nomes nas células, mais os rótulos de linha de Individual_nominations, cujas linhas são os participantes) é então procurado só entre os participantes da mesma edição, então cada nome é comparado com algumas dezenas de pessoas em vez de todos os participantes. Um nome é ligado quando é o nome completo, quando todas as suas palavras pertencem ao nome de um único participante, quando as suas palavras são o começo de palavras do nome de um único participante (Gil para Gilberto) ou, senão, quando o nome de um participante tem claramente as palavras mais parecidas pelos trigramas (Julliette para Juliette). As ligações são salvas no dataset Name_links (Edicao, Nome, ID_Participante, Metodo) e os nomes que não puderam ser ligados são listados em unresolved_names.csv.
+
+# Libraries
+
+import argparse
+import re
+
+import pandas as pd
+from unidecode import unidecode
+
+from BBB_Metrics import metrics, start_run, finish_run
+from BBB_Output import OUTPUT_FORMATS, read_dataset, write_dataset
+from BBB_Store import write_table
+from BBB_Changes import write_changes
+
+WEEKLY_TABLES = ["Nominations", "Individual_nominations", "Eviction_results"]
+
+# Words that don't tell people apart
+STOPWORDS = {"de", "da", "do", "das", "dos", "e"}
+
+# A trigram match must share at least this fraction of trigrams (Jaccard) and beat the runner-up by this margin
+MIN_SIMILARITY = 0.5
+MIN_MARGIN = 0.1
+
+# Shortest word taken as the start of a longer name ('Gil' for Gilberto)
+MIN_PREFIX = 3
+
+# Separators between several names in one cell ('Ana, Pedro', 'Ana e Pedro') and vote counts after a name ('Ana (3)')
+name_separators = re.compile(r",|;|/|\be\b|\n")
+vote_count = re.compile(r"\(\s*\d+\s*\)|\[\w+\]")
+non_word = re.compile(r"[^a-z0-9]+")
+
+
+# 'Gil do Vigor' -> ['gil', 'vigor']
+def name_tokens(name):
+    return [token for token in non_word.sub(" ", unidecode(name).lower()).split() if token not in STOPWORDS]
+
+
+def trigrams(tokens):
+    text = f"  {' '.join(tokens)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Similarity of a name (the trigrams of each word) to a contestant ({word: trigrams}): each word is scored (Jaccard)
+# against the most similar word of the contestant's name, so 'Julliette' is compared with 'Juliette', not with the whole full name
+def name_similarity(grams, words):
+    return sum(max(len(word & other) / len(word | other) for other in words.values()) for word in grams) / len(grams)
+
+
+# Function that splits a table cell into the names it contains, without vote counts (cells without letters give nothing)
+def cell_names(value):
+    if not isinstance(value, str):
+        return []
+    names = []
+    for part in name_separators.split(vote_count.sub(" ", value)):
+        part = part.strip()
+        if re.search(r"[A-Za-z]", part):
+            names.append(part)
+    return names
+
+
+class NameResolver:
+    """Index of the contestants' names, blocked by season, that links other spellings of the names to ID_Participante."""
+
+    def __init__(self, contestants):
+        self.seasons = {}
+        for edicao, nome, id_participante in contestants[["Edicao", "Nome", "ID_Participante"]].itertuples(index=False):
+            if not isinstance(nome, str) or pd.isna(id_participante):
+                continue
+            block = self.seasons.setdefault(int(edicao), {"names": {}, "tokens": {}, "trigrams": {}, "people": {}})
+            tokens = name_tokens(nome)
+            id_participante = int(id_participante)
+            block["names"].setdefault(" ".join(tokens), set()).add(id_participante)
+            # The trigrams of each word: a nickname is compared with the words of the name, not with the whole name
+            words = block["people"].setdefault(id_participante, {})
+            for token in tokens:
+                block["tokens"].setdefault(token, set()).add(id_participante)
+                words[token] = trigrams([token])
+                for gram in words[token]:
+                    block["trigrams"].setdefault(gram, set()).add(id_participante)
+
+    # Returns (ID_Participante or None, method) for one name in one season
+    def resolve(self, name, edicao):
+        block = self.seasons.get(int(edicao))
+        tokens = name_tokens(name)
+        if block is None or not tokens:
+            return None, "unresolved"
+
+        exact = block["names"].get(" ".join(tokens), set())
+        if len(exact) == 1:
+            return next(iter(exact)), "exact"
+
+        # Every word of the name in the same contestant's name: nicknames that are a first name or a surname
+        candidates = set.intersection(*(block["tokens"].get(token, set()) for token in tokens))
+        if len(candidates) == 1:
+            return next(iter(candidates)), "tokens"
+        if len(candidates) > 1:
+            return None, "ambiguous"
+
+        # Shortened names: every word of the name starts a word of the same contestant's name ('Gil' for Gilberto, 'Rafa' for Rafaella)
+        if all(len(token) >= MIN_PREFIX for token in tokens):
+            candidates = {id_participante for id_participante, words in block["people"].items()
+                          if all(any(word.startswith(token) for word in words) for token in tokens)}
+            if len(candidates) == 1:
+                return next(iter(candidates)), "prefix"
+
+        # Spelling variants: only the contestants sharing at least one trigram are scored
+        grams = [trigrams([token]) for token in tokens]
+        shared = {id_participante for word_grams in grams for gram in word_grams
+                  for id_participante in block["trigrams"].get(gram, ())}
+        scores = sorted(((name_similarity(grams, block["people"][id_participante]), id_participante)
+                         for id_participante in shared), reverse=True)
+        if scores and scores[0][0] >= MIN_SIMILARITY and (len(scores) == 1 or scores[0][0] - scores[1][0] >= MIN_MARGIN):
+            return scores[0][1], "trigrams"
+        return None, "unresolved"
+
+    # Resolves a DataFrame of (Edicao, Nome) pairs, each distinct pair once, adding ID_Participante and Metodo
+    def resolve_frame(self, names):
+        names = names[["Edicao", "Nome"]].drop_duplicates().reset_index(drop=True)
+        resolved = [self.resolve(nome, edicao) for edicao, nome in names.itertuples(index=False)]
+        names["ID_Participante"] = pd.array([id_participante for id_participante, _ in resolved], dtype="Int32")
+        names["Metodo"] = pd.Categorical([method for _, method in resolved])
+        return names
+
+
+# Tables whose row labels are housemates (the voters); the row labels of the others are things like Líder, Anjo or Votos
+VOTER_ROWS_TABLES = {"Individual_nominations"}
+
+
+# Function that collects every voter and nominee name of the weekly tables ({name: table}): the names in the cells,
+# and the row labels of the tables listing one voter per row
+def weekly_names(tables):
+    pairs = []
+    for name, table in tables.items():
+        voter_rows = name in VOTER_ROWS_TABLES
+        for edicao, linha, valor in table[["Edicao", "Linha", "Valor"]].itertuples(index=False):
+            for person in (cell_names(linha) if voter_rows else []) + cell_names(valor):
+                pairs.append((int(edicao), person))
+    return pd.DataFrame(pairs, columns=["Edicao", "Nome"])
+
+
+# Function that links the names of the weekly datasets to the contestants and saves the links and the unresolved names
+def link_names(output_formats=OUTPUT_FORMATS):
+    with metrics.span("read"):
+        contestants = read_dataset("Contestants", columns=["Edicao", "Nome", "ID_Participante"])
+        tables = {name: read_dataset(name, columns=["Edicao", "Linha", "Valor"]) for name in WEEKLY_TABLES}
+
+    with metrics.span("resolve"):
+        links = NameResolver(contestants).resolve_frame(weekly_names(tables))
+    for method, count in links["Metodo"].value_counts().items():
+        metrics.count("names", int(count), method=method)
+
+    with metrics.span("write"):
+        if 'parquet' in output_formats:
+            write_dataset("Name_links", links, replace=True)
+        if 'sqlite' in output_formats:
+            write_table("Name_links", links, replace=True)
+        if 'csv' in output_formats:
+            links.to_csv("Name_links.csv", index=False)
+        if 'changes' in output_formats:
+            write_changes("Name_links", links, replace=True)
+        unresolved = links[links["ID_Participante"].isna()]
+        unresolved.to_csv("unresolved_names.csv", index=False)
+    return links, unresolved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Link the names in the nominations tables to the contestants' IDs")
+    parser.add_argument("--formats", default=",".join(OUTPUT_FORMATS), help="comma-separated output formats: parquet, csv, sqlite, changes")
+    args = parser.parse_args()
+    start_run("names")
+
+    links, unresolved = link_names([f.strip() for f in args.formats.split(",") if f.strip()])
+    print(f"{len(links) - len(unresolved)} of {len(links)} names linked to a contestant, the rest are in unresolved_names.csv")
+    print(f"Run metrics saved to {finish_run()}")
@@ -28,175 +28,427 @@ from IPython.display import display
 from io import StringIO
 import csv
 import gzip
+import hashlib
+import os
+import sys
 from unidecode import unidecode
-import html5lib
-
-def nominations_scrape(url):
-
-    # Fetch the url content
-    response = requests.get(url)
-
-    # Parse the url content with BeautifulSoup
-    soup = BeautifulSoup(response.text, 'html5lib')
-    def remove_accents(text):
-        return unidecode(text) if isinstance(text, str) else text
-
-    # Iterate through all text elements in the HTML and replace accents
-    for element in soup.find_all(string=True):
-        element.replace_with(remove_accents(element))  # Replace text with de-a
-
-    print(soup)
+import lxml.html
+import argparse
+import multiprocessing
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from BBB_Gender_index import GenderIndex
+from BBB_Manifest import Manifest, fetch_revisions
+from BBB_Output import OUTPUT_FORMATS, weekly_to_long, write_dataset
+from BBB_Store import write_table
+from BBB_Changes import write_changes
+from BBB_Names import VOTER_ROWS_TABLES, cell_names
+from BBB_Metrics import metrics, start_run, finish_run, DEFAULT_PROFILE
+from BBB_Sections import fetch_section_html, DEFAULT_SOURCE, SOURCES
+from BBB_Fetch import get_fetcher, run_concurrently, print_summary, ResponseCache, DEFAULT_WORKERS, DEFAULT_MAX_PER_HOST, DEFAULT_CACHE_DIR, DEFAULT_OFFLINE
+
+# Function that returns the HTML of the table under the h2 with id="Histórico", or None if the page doesn't have one.
+# The page is parsed with lxml (C parser, no mutable BeautifulSoup tree) and only the table is serialised back.
+def extract_historico_table(page_html):
+    tree = lxml.html.fromstring(page_html)
 
     # Find the h2 with id="Histórico"
-    h2_header = soup.find('h2', {'id': 'Histórico'})
-    desired_table = None
-
-    if h2_header:
-        parent_div = h2_header.find_parent('div')
-        next_div = parent_div.find_next_sibling()
-
-    if next_div:
-        if next_div.name == "table":
-            desired_table = next_div
-        else:
-            desired_table = next_div.find("table", recursive=False)
-
-    # Normalising headers
-    if desired_table:
-
-        #Parsing html table to DataFrame
-        html_to_table = pd.read_html(StringIO(str(desired_table)))
-        Nominations_raw = html_to_table[0]
-
-        # Dynamically extract all column header levels into separate lists
-        all_levels = [Nominations_raw.columns.get_level_values(level).tolist() for level in range(Nominations_raw.columns.nlevels)]
-
-        # Merging these lists into one, creating column names that contain the information from the following levels, if any
-        headers = []
-
-        for items in zip(*all_levels): # Creates tuples for each column with the different levels.
-            merged_items = []
-            for i in range(len(items)): # For each item in each tuple
-                if i == 0 or items[i] != items[i - 1]: # If it's the first item or if the item is different from the previous item.
-                    merged_items.append(items[i]) # Include the item
-                else:
-                    merged_items.append("")  # Otherwise, add an empty string for duplicates
-            headers.append(" - ".join(filter(None, merged_items)))  # Combine non-empty values
-
-        #Set new headers
-        headers = ["" if "Unnamed" in item else item for item in headers] # Removing the "Unnamed" levels in the header (column 0)
-        Nominations_raw.columns = headers
-
-    # Separate the 3 tables.
+    h2_header = tree.xpath('//h2[@id="Histórico"]')
+    if not h2_header:
+        return None
+
+    # The h2 sits inside a heading div; the table is the next element after that div (or a direct child of it)
+    parent_div = h2_header[0].xpath('ancestor::div[1]')
+    if not parent_div:
+        return None
+    next_div = parent_div[0].getnext()
+    while next_div is not None and not isinstance(next_div.tag, str):  # skip comments
+        next_div = next_div.getnext()
+    if next_div is None:
+        return None
+
+    desired_table = next_div if next_div.tag == "table" else next_div.find("table")
+    if desired_table is None:
+        return None
+    return lxml.html.tostring(desired_table, encoding="unicode")
+
+# Function that returns the HTML of the table in the Histórico section returned by the MediaWiki API.
+# The section ends at the next h2, so when the heading layout isn't the expected one its first table is the one we want.
+def extract_section_table(section_html):
+    desired_table = extract_historico_table(section_html)
+    if desired_table is None:
+        tables = lxml.html.fromstring(section_html).xpath('//table')
+        desired_table = lxml.html.tostring(tables[0], encoding="unicode") if tables else None
+    return desired_table
+
+# Function that removes accents from every text cell of a DataFrame.
+# unidecode runs once per distinct non-ASCII value and the results are swapped in with a single replace.
+def remove_accents_frame(df):
+    values = pd.unique(df.to_numpy(dtype=object).ravel())
+    mapping = {value: unidecode(value) for value in values if isinstance(value, str) and not value.isascii()}
+    return df.replace(mapping) if mapping else df
+
+# Function that lists every name in the nominations tables ({name: table}) with its census gender, using the same local
+# index as the contestants script: the names in the cells (split like BBB_Names does, without vote counts), and the
+# column labels of the tables whose labels are the voters (the other tables' labels are things like Líder or Indicados)
+def nominee_genders(tables, gender_index):
+    names = []
+    for name, table in tables.items():
+        table = table.drop(columns='Edicao', errors='ignore')
+        if name in VOTER_ROWS_TABLES:
+            names += [person for label in table.columns for person in cell_names(label)]
+        names += [person for value in pd.unique(table.to_numpy(dtype=object).ravel()) for person in cell_names(value)]
+    names = pd.Series(pd.unique(pd.Series(names, dtype=object)), dtype=object)
+    return pd.DataFrame({'Nome': names, 'Genero': gender_index.genders_of_names(names)})
+
+# Stage: parsing the Histórico table HTML into a DataFrame with one merged header per column
+def read_table(desired_table):
+
+    #Parsing html table to DataFrame
+    html_to_table = pd.read_html(StringIO(desired_table))
+    Nominations_raw = html_to_table[0]
+
+    # Dynamically extract all column header levels into separate lists
+    all_levels = [Nominations_raw.columns.get_level_values(level).tolist() for level in range(Nominations_raw.columns.nlevels)]
+
+    # Merging these lists into one, creating column names that contain the information from the following levels, if any
+    headers = []
+
+    for items in zip(*all_levels): # Creates tuples for each column with the different levels.
+        merged_items = []
+        for i in range(len(items)): # For each item in each tuple
+            if i == 0 or items[i] != items[i - 1]: # If it's the first item or if the item is different from the previous item.
+                merged_items.append(items[i]) # Include the item
+            else:
+                merged_items.append("")  # Otherwise, add an empty string for duplicates
+        headers.append(" - ".join(filter(None, merged_items)))  # Combine non-empty values
+
+    #Set new headers
+    headers = ["" if "Unnamed" in item else item for item in headers] # Removing the "Unnamed" levels in the header (column 0)
+    Nominations_raw.columns = headers
+    return Nominations_raw
+
+# Stage: removing accents from the table cells and headers only
+def normalise_table(Nominations_raw):
+    Nominations_raw = remove_accents_frame(Nominations_raw)
+    Nominations_raw.columns = [unidecode(header) for header in Nominations_raw.columns]
+    return Nominations_raw
+
+# Sections of the Histórico table in page order, and where each one drops duplicate columns:
+# 'weeks' before the transpose (the week columns), 'rows' after it (the row labels that became columns).
+# Sections beyond these get the name Section_<n> and no deduplication.
+sections = {
+    'Nominations': ('weeks',),
+    'Individual_nominations': (),
+    'Eviction_results': ('weeks', 'rows'),
+}
+
+# Stage: separating the table into its sections at the divider rows (rows where all columns are null)
+def split_sections(Nominations_raw):
 
     # Replace empty cells with nulls
-    Nominations_raw.replace(r'^\s*$', None, regex=True, inplace=True)
-    Nominations_raw.replace(r'(nenhum)', None, regex=True, inplace=True)
+    Nominations_raw = Nominations_raw.replace(r'^\s*$', None, regex=True)
+    Nominations_raw = Nominations_raw.replace(r'(nenhum)', None, regex=True)
 
     # Identify rows where all columns are null - the dividers
-    divider_index = Nominations_raw[Nominations_raw.isnull().all(axis=1)].index
-
-    # Split the DataFrame into three parts based on the dividing row indices and add the headers created above
-    df_part1 = Nominations_raw.iloc[:divider_index[0]]  # From start to first blank row
-    df_part1.columns = headers
-    df_part2 = Nominations_raw.iloc[divider_index[0]+1:divider_index[1]]  # Between the blank rows
-    df_part2.columns = headers
-    df_part3 = Nominations_raw.iloc[divider_index[1]+1:]
-    df_part3.columns = headers
-
-    # Storing the individual tables into dataframes
-    Nominations = pd.DataFrame(df_part1)
-    Individual_nominations = pd.DataFrame(df_part2)
-    Eviction_results = pd.DataFrame(df_part3)
-
-    # Manipulating the Nominations table
-
-    # Remove Na columns
-    Nominations = Nominations.dropna(axis=1, how='all')
-
-    # Set index for rows
-    index_column = Nominations.columns[0]
-    Nominations.set_index(index_column)
-
-    # Drop any duplicate columns to the index
-    Nominations = Nominations.loc[:, ~Nominations.T.duplicated()]
-
-    #Transpose the table
-    Nominations = Nominations.T
-    Nominations.columns = Nominations.iloc[0]
-    Nominations = Nominations[1:]
-
-    # Adding the year of the current file
-    Nominations['Edicao'] = url.rsplit('_', 1)[-1]
-
-    # Renaming index column
-    Nominations.index.name = 'Semana'
-
-    # Manipulating the Individual_nominations table
-
-    # Remove Na columns
-    Individual_nominations = Individual_nominations.dropna(axis=1, how='all')
-
-    # Set index for rows
-    Individual_nominations.set_index(Individual_nominations.columns[0])
-
-    #Transpose the table
-    Individual_nominations = Individual_nominations.T
-    Individual_nominations.columns = Individual_nominations.iloc[0]
-    Individual_nominations = Individual_nominations[1:]
-
-    # Adding the year of the current file
-    Individual_nominations['Edicao'] = url.rsplit('_', 1)[-1]
-
-    # Renaming index column
-    Individual_nominations.index.name = 'Semana'
-
-    # Manipulating the Eviction_results table
+    is_divider = Nominations_raw.isnull().all(axis=1).to_numpy()
+    metrics.count("dividers_found", int(is_divider.sum()))
+
+    # Cut at every divider, skipping empty pieces (two dividers in a row, or one at the start or the end)
+    parts = []
+    start = 0
+    for position in list(is_divider.nonzero()[0]) + [len(Nominations_raw)]:
+        if position > start:
+            parts.append(Nominations_raw.iloc[start:position])
+        start = position + 1
+
+    names = list(sections) + [f'Section_{n}' for n in range(len(sections) + 1, len(parts) + 1)]
+    metrics.count("sections_found", len(parts))
+    return dict(zip(names, parts))
+
+# Function that drops columns with the same values as an earlier column.
+# Each column is reduced to the hashes of its cells, so the comparison needs no transposed copy of the table.
+def drop_duplicate_columns(df, table):
+    keys = [pd.util.hash_pandas_object(df.iloc[:, i], index=False).to_numpy().tobytes() for i in range(df.shape[1])]
+    keep = ~pd.Series(keys).duplicated().to_numpy()
+    metrics.count("duplicate_columns_dropped", int((~keep).sum()), table=table)
+    return df.loc[:, keep]
+
+# Stage: dropping empty and duplicate columns and transposing a section so there is one row per week
+def reshape_section(section, name, edicao):
+    dedupe = sections.get(name, ())
 
     # Remove Na columns
-    Eviction_results = Eviction_results.dropna(axis=1, how='all')
-
-    # Set index for rows
-    Eviction_results.set_index(Eviction_results.columns[0])
+    section = section.dropna(axis=1, how='all')
 
     # Drop any duplicate columns to the index
-    Eviction_results = Eviction_results.loc[:, ~Eviction_results.T.duplicated()]
+    if 'weeks' in dedupe:
+        section = drop_duplicate_columns(section, name)
 
-    #Transpose the table
-    Eviction_results_t = Eviction_results.T
-    Eviction_results_t.columns = Eviction_results_t.iloc[0]
-    Eviction_results = Eviction_results_t[1:]
+    #Transpose the table, the first column (the row labels) becoming the header
+    section = section.T
+    section.columns = section.iloc[0]
+    section = section[1:]
 
-    # Drop any duplicate columns to the index
-    Eviction_results = Eviction_results.loc[:, ~Eviction_results.T.duplicated()]
+    if 'rows' in dedupe:
+        section = drop_duplicate_columns(section, f'{name}_transposed')
 
     # Adding the year of the current file
-    Eviction_results['Edicao'] = url.rsplit('_', 1)[-1]
+    section['Edicao'] = edicao
 
     # Renaming index column
-    Eviction_results.index.name = 'Semana'
-
-     # Save to csv
+    section.index.name = 'Semana'
+    return section
+
+def reshape_sections(split, edicao):
+    return {name: reshape_section(section, name, edicao) for name, section in split.items()}
+
+# Stage: saving the tables of a season
+def save_tables(tables, year, output_formats=OUTPUT_FORMATS, gender_index=None):
+    outputs = []
+    for name, table in tables.items():
+        metrics.count("rows", len(table), table=name)
+
+    # Save into the season's partition of the Parquet datasets
+    if 'parquet' in output_formats:
+        for name, table in tables.items():
+            outputs += write_dataset(name, weekly_to_long(table))
+
+    # Load into the local SQLite store, one transaction per table
+    if 'sqlite' in output_formats:
+        for name, table in tables.items():
+            write_table(name, weekly_to_long(table))
+
+    # Save to csv (Individual_nominations -> individualnominations2002)
+    if 'csv' in output_formats:
+        for name, table in tables.items():
+            outputs.append(f"{name.lower().replace('_', '')}{year}")
+            table.to_csv(outputs[-1])
+
+    # Rows inserted, updated or deleted since the previous run, for incremental loads downstream
+    if 'changes' in output_formats:
+        for name, table in tables.items():
+            write_changes(name, weekly_to_long(table))
+
+    # Optionally tag everyone who voted or was nominated with their census gender
+    if gender_index is not None:
+        outputs.append(f'nomineegenders{year}')
+        voting = {name: tables[name] for name in ('Nominations', 'Individual_nominations') if name in tables}
+        nominee_genders(voting, gender_index).to_csv(outputs[-1], index=False)
+
+    return outputs
+
+# I/O side of a season: download the Histórico section (or the whole page) and cut out the table.
+# Returns the table HTML (a few KB, the only part of the page the later stages need) and the hash of the downloaded content.
+# When the content hash equals previous_sha256 nothing is parsed and the table HTML is None.
+def fetch_table(url, fetcher=None, source=DEFAULT_SOURCE, revision=None, previous_sha256=None):
     year = url.rsplit('_', 1)[-1]
+    with metrics.labels(season=year):
+        fetcher = fetcher or get_fetcher()
+
+        # Only the Histórico section through the MediaWiki API, when asked to
+        if source == "api":
+            try:
+                with metrics.span("fetch_section"):
+                    section_html = fetch_section_html(url, fetcher, revision)
+            except Exception as e:
+                print(f"Could not fetch the Histórico section of {url} from the API, using the full page: {e}")
+                section_html = None
+            if section_html is not None:
+                content_sha256 = hashlib.sha256(section_html.encode("utf-8")).hexdigest()
+                if content_sha256 == previous_sha256:
+                    return None, content_sha256
+                with metrics.span("html_parse"):
+                    desired_table = extract_section_table(section_html)
+                if desired_table is not None:
+                    return desired_table, content_sha256
+            metrics.count("section_fallbacks")
+
+        # Fetch the url content through the shared pooled session
+        with metrics.span("fetch"):
+            response = fetcher.get(url)
+        content_sha256 = hashlib.sha256(response.content).hexdigest()
+        if content_sha256 == previous_sha256:
+            return None, content_sha256
+
+        # Locate the Histórico table without building a tree of the whole article
+        with metrics.span("html_parse"):
+            desired_table = extract_historico_table(response.text)
+        if desired_table is None:
+            raise ValueError(f"No table found under the Histórico section of {url}")
+
+    return desired_table, content_sha256
+
+# CPU side of a season: from the table HTML to the reshaped tables, one per section
+def process_table(desired_table, year):
+    with metrics.labels(season=year):
+        with metrics.span("read_html"):
+            Nominations_raw = read_table(desired_table)
+        with metrics.span("accent_normalisation"):
+            Nominations_raw = normalise_table(Nominations_raw)
+        with metrics.span("divider_split"):
+            split = split_sections(Nominations_raw)
+        with metrics.span("transpose_dedupe"):
+            return reshape_sections(split, year)
+
+# process_table as run in a worker process: the metrics recorded there travel back with the tables
+def process_table_in_worker(desired_table, year, profile=None):
+    metrics.profile = profile
+    metrics.drain()
+    with metrics.labels(season=year), metrics.profiled(f"season_{year}"):
+        tables = process_table(desired_table, year)
+    return tables, metrics.drain()
+
+def nominations_scrape(url, fetcher=None, gender_index=None, output_formats=OUTPUT_FORMATS, source=DEFAULT_SOURCE, revision=None):
 
-    Nominations.to_csv(f'nominations{year}')
-    Individual_nominations.to_csv(f'individualnominations{year}')
-    Eviction_results.to_csv(f'evictionresults{year}')
+    year = url.rsplit('_', 1)[-1]
+    with metrics.labels(season=year), metrics.profiled(f"season_{year}"):
+        desired_table, content_sha256 = fetch_table(url, fetcher, source, revision)
+        tables = process_table(desired_table, year)
+        with metrics.span("write"):
+            outputs = save_tables(tables, year, output_formats, gender_index)
+
+    print(f"{' and '.join(output_formats)} files successfully saved")
+
+    # What the manifest needs to know about this run of the page
+    return {"content_sha256": content_sha256, "outputs": outputs}
+
+# Function that scrapes many seasons as a pipeline: fetch -> extract table -> normalise -> split/reshape -> write.
+# Fetching and extracting run on a pool of I/O threads, the pandas work runs on a pool of processes (it holds the GIL,
+# so threads can't spread it over the cores) and the main thread writes the results. Bounded queues between the
+# stages keep at most a few pages waiting at each step. Returns the same summary as run_concurrently.
+def run_pipeline(urls, fetcher=None, io_workers=DEFAULT_WORKERS, cpu_workers=None, gender_index=None,
+                 output_formats=OUTPUT_FORMATS, profile=None, source=DEFAULT_SOURCE, revisions=None):
+    fetcher = fetcher or get_fetcher()
+    revisions = revisions or {}
+    cpu_workers = cpu_workers or os.cpu_count() or 1
+    extracted = queue.Queue(maxsize=2 * cpu_workers)
+    started = {}
+    summary = {}
+
+    def fetch_stage(url):
+        started[url] = time.perf_counter()
+        try:
+            extracted.put((url, fetch_table(url, fetcher, source, revisions.get(url)), None))
+        except Exception as e:
+            extracted.put((url, None, e))
+
+    def finish(url, result=None, error=None):
+        seconds = time.perf_counter() - started[url]
+        if error is None:
+            summary[url] = {"url": url, "status": "ok", "result": result, "seconds": seconds}
+        else:
+            summary[url] = {"url": url, "status": "error", "error": f"{type(error).__name__}: {error}", "seconds": seconds}
+
+    # Write stage, in the main thread
+    def write_stage(future):
+        url, year, content_sha256 = pending.pop(future)
+        try:
+            tables, worker_metrics = future.result()
+            metrics.merge(worker_metrics)
+            with metrics.labels(season=year), metrics.span("write"):
+                outputs = save_tables(tables, year, output_formats, gender_index)
+        except Exception as e:
+            finish(url, error=e)
+        else:
+            finish(url, {"content_sha256": content_sha256, "outputs": outputs})
+
+    # Worker processes are started with spawn so they don't inherit the fetch threads' locks
+    pending = {}
+    with ThreadPoolExecutor(max_workers=max(1, io_workers)) as io_pool, \
+            ProcessPoolExecutor(max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn")) as cpu_pool:
+        for url in urls:
+            io_pool.submit(fetch_stage, url)
+
+        for _ in urls:
+            url, fetched, error = extracted.get()
+            if error is not None:
+                finish(url, error=error)
+                continue
+            desired_table, content_sha256 = fetched
+            year = url.rsplit('_', 1)[-1]
+            future = cpu_pool.submit(process_table_in_worker, desired_table, year, profile)
+            pending[future] = (url, year, content_sha256)
+
+            # Backpressure: write finished seasons before handing more work to the processes
+            while len(pending) >= 2 * cpu_workers:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    write_stage(future)
+
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                write_stage(future)
+
+    # Keep the summary in the same order as the input urls
+    return {url: summary[url] for url in urls}
 
-    return print("CSV files successfully saved")
-    
 # List of URLs to process
 base_url = "https://pt.wikipedia.org/wiki/Big_Brother_Brasil_"
 number_of_shows = 25
 
 urls = [f"{base_url}{i}" for i in range(1, number_of_shows + 1)]
 
-for url in urls:
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape the nominations tables of every BBB season")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="number of seasons fetched at the same time")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1, help="processes parsing and reshaping tables (0 parses in the fetch threads)")
+    parser.add_argument("--max-per-host", type=int, default=DEFAULT_MAX_PER_HOST, help="maximum concurrent requests to the same host")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="directory of the on-disk page cache")
+    parser.add_argument("--offline", action="store_true", default=DEFAULT_OFFLINE, help="only replay pages from the cache, never touch the network")
+    parser.add_argument("--source", choices=SOURCES, default=DEFAULT_SOURCE, help="'api' fetches only the Histórico section through the MediaWiki API, 'page' the whole article")
+    parser.add_argument("--formats", default=",".join(OUTPUT_FORMATS), help="comma-separated output formats: parquet, csv, sqlite, changes")
+    parser.add_argument("--tag-gender", action="store_true", help="also save the census gender of every voter and nominee")
+    parser.add_argument("--metrics", default=os.environ.get("BBB_METRICS_PATH"), help="JSON file for the run metrics (default metrics/nominations.json)")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"], default=DEFAULT_PROFILE, help="profile each season (use tracemalloc with --workers 1)")
+    parser.add_argument("--full", action="store_true", default=os.environ.get("BBB_FULL_REFRESH") == "1", help="scrape every season even if its page hasn't changed since the last run")
+    args = parser.parse_args()
+    start_run("nominations", args.profile)
+
+    fetcher = get_fetcher()
+    fetcher.max_per_host = args.max_per_host
+    fetcher.set_pool_size(max(args.workers, args.max_per_host))
+    fetcher.cache = ResponseCache(args.cache_dir)
+    fetcher.offline = args.offline
+
+    gender_index = GenderIndex() if args.tag_gender else None
+
+    # Checking the current revision of every season page in one batched request and keeping only the ones that changed
+    manifest = Manifest.load("nominations")
     try:
-        nominations_scrape(url)
-        print(f"Processed and saved CSV files for: {url}")
+        revisions = fetch_revisions(urls, fetcher)
     except Exception as e:
-        print(f"Error processing {url}: {e}")
+        print(f"Could not check page revisions, scraping every season: {e}")
+        revisions = {}
+    stale_urls = [url for url in urls if args.full or manifest.needs_refresh(url, revisions.get(url))]
+    print(f"{len(urls) - len(stale_urls)} of {len(urls)} seasons unchanged since the last run")
+
+    # Processing the changed seasons concurrently and collecting the outcome of each one
+    output_formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    if args.parse_workers > 0:
+        summary = run_pipeline(stale_urls, fetcher, args.workers, args.parse_workers, gender_index, output_formats, args.profile,
+                               args.source, revisions)
+    else:
+        summary = run_concurrently(lambda url: nominations_scrape(url, fetcher, gender_index, output_formats, args.source, revisions.get(url)),
+                                   stale_urls, workers=args.workers)
+    failed = print_summary(summary)
+
+    for url, outcome in summary.items():
+        if outcome["status"] == "ok":
+            manifest.record(url, revisions.get(url), outcome["result"]["content_sha256"], outcome["result"]["outputs"])
+    manifest.save()
+    fetcher.close()
+
+    # Saving the stage timings and counters of this run
+    metrics.count("seasons_skipped", len(urls) - len(stale_urls))
+    metrics.count("seasons_failed", len(failed))
+    print(f"Run metrics saved to {finish_run(args.metrics)}")
+
+    # A failed season fails the run (and the Kestra task)
+    if failed:
+        sys.exit(1)
 
 
 
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: rule tables for normalising text columns
+# (Portuguese below)
+#
+# Columns like Profissao and Resultado are normalised by an ordered list of (pattern, replacement) rules, e.g. to make gendered words neutral. Applying each rule with its own str.replace means one full pass over the column per rule. This module compiles the whole list into a single alternation regex and a lookup of replacements, so the column is scanned once. Chains of rules are resolved: each replacement is first run through the rules that come after it, so 'Surfista profissional' -> 'Surfista' -> 'Atleta surfista' still ends in the same place as applying the rules one after the other. Overlapping matches are not: when the text matched by one rule overlaps the text matched by a later rule, the single pass takes the leftmost match, where the rules one after the other would apply the earlier rule first ('aquiadorançarina' is 'aquiadornçarino' one rule after the other but 'aquiadornçarina' in one pass). It also parses the Portuguese dates of the tables ('1 de março de 2002') into datetimes.
+#
+# Script: tabelas de regras para normalizar colunas de texto
+# Colunas como Profissao e Resultado são normalizadas por uma lista ordenada de regras (padrão, substituição), por exemplo para tornar neutras as palavras com gênero. Aplicar cada regra com seu próprio str.replace significa percorrer a coluna inteira uma vez por regra. Este módulo compila a lista inteira numa única regex com alternativas e numa tabela de substituições, então a coluna é percorrida uma vez só. As cadeias de regras são resolvidas: cada substituição passa antes pelas regras seguintes, então 'Surfista profissional' -> 'Surfista' -> 'Atleta surfista' termina no mesmo lugar que aplicando as regras uma depois da outra. Trechos sobrepostos não são: quando o texto de uma regra se sobrepõe ao texto de uma regra seguinte, a passada única fica com o trecho mais à esquerda, enquanto as regras uma depois da outra aplicariam primeiro a regra anterior ('aquiadorançarina' vira 'aquiadornçarino' regra por regra mas 'aquiadornçarina' numa passada só). O módulo também converte as datas em português das tabelas ('1 de março de 2002') em datetimes.
+
+# Libraries
+
+import re
+
+import pandas as pd
+from unidecode import unidecode
+
+
+# Function that removes accents from a Series of strings, calling unidecode once per distinct value instead of once per row
+def remove_accents(series):
+    uniques = series.dropna().unique()
+    mapping = {value: unidecode(value) for value in uniques}
+    return series.map(mapping)
+
+
+class RuleSet:
+    """Ordered (pattern, replacement) regex rules compiled into one matcher.
+
+    Patterns are tried in rule order at each position of the text, so an earlier rule wins over a later one
+    starting at the same place. Chains (a replacement matched by a later rule) give the same result as applying
+    the rules one after the other; overlapping matches don't, as the leftmost match wins. Patterns must not
+    contain capturing groups (use (?:...) instead).
+    """
+
+    def __init__(self, rules):
+        unique_rules = []
+        seen = set()
+        for pattern, replacement in rules:
+            # A repeated pattern can never match again after its first application, so only the first one counts
+            if pattern in seen:
+                continue
+            seen.add(pattern)
+            if re.compile(pattern).groups:
+                raise ValueError(f"Rule pattern {pattern!r} must not contain capturing groups")
+            unique_rules.append((pattern, replacement))
+        self.rules = unique_rules
+
+        # Resolve chains at compile time: the final text for a rule is its replacement after all later rules
+        self.replacements = []
+        for i, (pattern, replacement) in enumerate(unique_rules):
+            for later_pattern, later_replacement in unique_rules[i + 1:]:
+                replacement = re.sub(later_pattern, later_replacement, replacement)
+            self.replacements.append(replacement)
+
+        # One capturing group per rule, so the group that matched tells us which replacement to use
+        self.pattern = re.compile("|".join(f"({pattern})" for pattern, _ in unique_rules))
+
+    def _replace(self, match):
+        return self.replacements[match.lastindex - 1]
+
+    # Normalise a single string
+    def sub(self, text):
+        return self.pattern.sub(self._replace, text)
+
+    # Normalise a pandas Series of strings in one pass (missing values stay missing)
+    def apply(self, series):
+        return series.str.replace(self.pattern, self._replace, regex=True)
+
+
+# Month names used in the Portuguese dates of the Wikipedia tables
+portuguese_months = {
+    'janeiro': 1, 'fevereiro': 2, 'março': 3, 'abril': 4, 'maio': 5, 'junho': 6,
+    'julho': 7, 'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12,
+}
+
+# '1 de março de 2002' or '1º de março de 2002', anywhere in the text (e.g. followed by the age in brackets)
+portuguese_date_pattern = re.compile(r'(\d{1,2})º? de (' + '|'.join(portuguese_months) + r') de (\d{4})', re.IGNORECASE)
+
+
+# Function that parses a Series of Portuguese dates into datetimes (NaT when there is no date, e.g. 'Em andamento')
+def parse_portuguese_dates(series):
+    parts = series.str.extract(portuguese_date_pattern)
+    return pd.to_datetime(pd.DataFrame({
+        'year': pd.to_numeric(parts[2]),
+        'month': parts[1].str.lower().map(portuguese_months),
+        'day': pd.to_numeric(parts[0]),
+    }), errors='coerce')
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: writing the scraped tables as partitioned Parquet datasets
+# (Portuguese below)
+#
+# Each scraped table is saved into one Parquet dataset partitioned by season (data/<Table>/Edicao=<n>/part-0.parquet) with a fixed schema and zstd compression, so loading one season or a few columns only reads the files and columns it needs, with the types already set (categories, small integers and dates for the contestants).
+#
+# The Nominations, Individual_nominations and Eviction_results tables have different columns in every season (the housemates' names, the rows of the Wikipedia table), so they are stored in long format: one row per week and row label of the Wikipedia table, with its value. CSV files are still written when the 'csv' format is selected, the 'sqlite' format loads the same tables into a local SQLite file (see BBB_Store.py) and the 'changes' format saves what changed since the previous run (see BBB_Changes.py).
+#
+# Script: salvando as tabelas extraídas como datasets Parquet particionados
+# Cada tabela extraída é salva num dataset Parquet particionado por edição (data/<Tabela>/Edicao=<n>/part-0.parquet) com um esquema fixo e compressão zstd, então carregar uma edição ou algumas colunas lê só os arquivos e colunas necessários, com os tipos já definidos (categorias, inteiros pequenos e datas para os participantes).
+#
+# As tabelas Nominations, Individual_nominations e Eviction_results têm colunas diferentes em cada edição (os nomes dos participantes, as linhas da tabela da Wikipedia), então elas são guardadas em formato longo: uma linha por semana e rótulo de linha da tabela da Wikipedia, com o seu valor. Os arquivos CSV continuam sendo gerados quando o formato 'csv' é escolhido, o formato 'sqlite' carrega as mesmas tabelas num arquivo SQLite local (veja BBB_Store.py) e o formato 'changes' salva o que mudou desde a execução anterior (veja BBB_Changes.py).
+
+# Libraries
+
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DATA_DIR = os.environ.get("BBB_DATA_DIR", "data")
+OUTPUT_FORMATS = [f.strip() for f in os.environ.get("BBB_OUTPUT_FORMATS", "parquet,csv,changes").split(",") if f.strip()]
+COMPRESSION = "zstd"
+
+# Columns with few distinct values are dictionary-encoded, and come back from read_dataset as pandas categories
+CATEGORY = pa.dictionary(pa.int16(), pa.string())
+
+PARTITION_SCHEMA = pa.schema([("Edicao", pa.int16())])
+
+# Long format shared by the three tables of the nominations pages
+WEEKLY_SCHEMA = pa.schema([
+    ("Semana", pa.string()),
+    ("Ordem_Semana", pa.int16()),
+    ("Linha", pa.string()),
+    ("Valor", pa.string()),
+])
+
+SCHEMAS = {
+    "Nominations": WEEKLY_SCHEMA,
+    "Individual_nominations": WEEKLY_SCHEMA,
+    "Eviction_results": WEEKLY_SCHEMA,
+    # Any other section of the nominations tables (Section_<n>) also uses WEEKLY_SCHEMA
+    "Contestants": pa.schema([
+        ("ID_Participante", pa.int32()),
+        ("Nome", pa.string()),
+        ("Primeiro_Nome", pa.string()),
+        ("Genero", CATEGORY),
+        ("Data_Nascimento", pa.date32()),
+        ("Profissao", pa.string()),
+        ("Nacionalidade", CATEGORY),
+        ("Cidade", CATEGORY),
+        ("Estado", CATEGORY),
+        ("Resultado", CATEGORY),
+        ("Data_Resultado", pa.date32()),
+        ("Ano_Edicao", pa.int16()),
+    ]),
+    # Names of the weekly tables linked to the contestants (see BBB_Names.py)
+    "Name_links": pa.schema([
+        ("Nome", pa.string()),
+        ("ID_Participante", pa.int32()),
+        ("Metodo", CATEGORY),
+    ]),
+}
+
+
+# Function that turns a wide season table (one row per week, as produced by nominations_scrape) into the long format
+def weekly_to_long(table):
+    wide = table.drop(columns="Edicao", errors="ignore")
+    values = pd.DataFrame(wide.to_numpy(dtype=object), columns=[str(column) for column in wide.columns])
+    values.insert(0, "Ordem_Semana", range(1, len(values) + 1))
+    values.insert(0, "Semana", [str(week) for week in wide.index])
+
+    # Rows with the same label (e.g. two nominees in a week) stay separate rows, empty cells are dropped
+    long = values.melt(id_vars=["Semana", "Ordem_Semana"], var_name="Linha", value_name="Valor", ignore_index=True)
+    long = long.dropna(subset=["Valor"]).sort_values(["Ordem_Semana"], kind="stable").reset_index(drop=True)
+    long["Valor"] = long["Valor"].astype(str)
+    long["Edicao"] = int(table["Edicao"].iloc[0])
+    return long
+
+
+def partition_path(name, edicao, data_dir=DATA_DIR):
+    return os.path.join(data_dir, name, f"Edicao={int(edicao)}", "part-0.parquet")
+
+
+# Function that writes a table into its dataset, one file per season present in the table.
+# Seasons not in the table are left alone, unless replace=True, in which case the dataset ends up with only these seasons.
+def write_dataset(name, df, data_dir=DATA_DIR, replace=False):
+    schema = SCHEMAS.get(name, WEEKLY_SCHEMA)
+    dataset_dir = os.path.join(data_dir, name)
+    if replace and os.path.isdir(dataset_dir):
+        shutil.rmtree(dataset_dir)
+
+    paths = []
+    for edicao, season in df.groupby(df["Edicao"].astype(int), sort=True):
+        path = partition_path(name, edicao, data_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(season[schema.names], schema=schema, preserve_index=False)
+        pq.write_table(table, path + ".tmp", compression=COMPRESSION)
+        os.replace(path + ".tmp", path)
+        paths.append(path)
+    return paths
+
+
+# Function that loads a dataset, optionally only some seasons and columns (pushed down to the Parquet reader)
+def read_dataset(name, edicao=None, columns=None, data_dir=DATA_DIR):
+    dataset = ds.dataset(os.path.join(data_dir, name), format="parquet",
+                         schema=pa.unify_schemas([SCHEMAS.get(name, WEEKLY_SCHEMA), PARTITION_SCHEMA]),
+                         partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"))
+    season_filter = None
+    if edicao is not None:
+        seasons = [edicao] if isinstance(edicao, (int, str)) else list(edicao)
+        season_filter = ds.field("Edicao").isin([int(season) for season in seasons])
+    return dataset.to_table(columns=columns, filter=season_filter).to_pandas(date_as_object=False)
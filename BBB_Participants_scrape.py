@@ -28,9 +28,22 @@ import requests
 from bs4 import BeautifulSoup
 from IPython.display import display
 from io import StringIO
+import lxml.html
 import csv
 import gzip
+import hashlib
+import os
+import re
+import sys
 from unidecode import unidecode
+from BBB_Fetch import get_fetcher
+from BBB_Normalise import RuleSet, parse_portuguese_dates, remove_accents
+from BBB_Gender_index import GenderIndex
+from BBB_Manifest import Manifest, fetch_revisions
+from BBB_Output import OUTPUT_FORMATS, write_dataset
+from BBB_Store import write_table
+from BBB_Changes import IdRegistry, write_changes
+from BBB_Metrics import metrics, start_run, finish_run
 
 
 # In[2]:
@@ -39,41 +52,117 @@ from unidecode import unidecode
 # URL of the Wikipedia page containing 25 tables with the contestants' information
 url = "https://pt.wikipedia.org/wiki/Lista_de_participantes_do_Big_Brother_Brasil"
 
-# Requesting the URL and locating the relevant tables
-response = requests.get(url)
-soup = BeautifulSoup(response.content, 'html.parser')
-tables = soup.find_all("table", {"class": "wikitable"})
-
-#Storing the tables into a dataframe with a table identifier 'Edicao' (Season).
-dataframes = []
-
-for i, table in enumerate(tables):  # Skip the first two tables
-    df = pd.read_html(StringIO(str(table)))[0]  # Convert HTML table to DataFrame
-    df['Edicao'] = f'{i+1}'  # Add a TableID column, start from Table_3
-    dataframes.append(df)
-
-contestants = pd.concat(dataframes, ignore_index=True)
-
-# One of the tables had the Name column named differently, fixing this:
-contestants['Nome completo'] = contestants['Nome completo'].fillna(contestants['Participantes']) 
-
-# Removing spaces and accents from column names
-contestants.rename(columns={'Nome completo': 'Nome'}, inplace=True)
-contestants.rename(columns={'Data de nascimento': 'Data_Nascimento'}, inplace=True)
-contestants.rename(columns={'Profissão': 'Profissao'}, inplace=True)
-
-# Dropping irrelevant columns
-contestants = contestants.drop(columns=['Ref.', 'Participantes'])
-
-# Removing headers of subsequent tables
-contestants = contestants[contestants["Origem"].str.contains("Origem") == False]
-
-
-# In[4]:
-
-
-#There were nas under the Results column for the ongoing season. Replaced these with "Ongoing". 
-contestants['Resultado'] = contestants['Resultado'].fillna(value="Em andamento em Em andamento")
+# Name used in the contestants table for each column of the season tables (None drops the column).
+# One of the tables calls the Name column 'Participantes' instead of 'Nome completo'.
+column_names = {
+    'Nome completo': 'Nome',
+    'Participantes': 'Nome',
+    'Origem': 'Origem',
+    'Data de nascimento': 'Data_Nascimento',
+    'Profissão': 'Profissao',
+    'Resultado': 'Resultado',
+    'Ref.': None,
+}
+
+whitespace = re.compile(r"[\r\n]+|\s{2,}")
+
+# Text of a cell as pd.read_html reads it: all the text inside it, with runs of whitespace collapsed
+def cell_text(cell):
+    return whitespace.sub(" ", cell.text_content().strip())
+
+# Function that turns the <tr>s of a table into rows of texts, repeating cells with rowspan/colspan like pd.read_html does
+def expand_rows(rows):
+    all_texts = []
+    remainder = []  # (column, text, rows left) of cells spanning into the next rows
+
+    for tr in rows:
+        texts = []
+        next_remainder = []
+        index = 0
+        for cell in tr.xpath("./td|./th"):
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+
+            text = cell_text(cell)
+            rowspan = int(cell.get("rowspan") or 1)
+            colspan = int(cell.get("colspan") or 1)
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    return all_texts
+
+def is_header_row(tr):
+    return all(cell.tag == "th" for cell in tr.xpath("./td|./th"))
+
+# Reading every season table in one pass over the page, straight into one column buffer with a table identifier 'Edicao' (Season).
+# Header rows (the first one and the ones repeated inside the tables) are recognised while walking the rows and never stored.
+def parse_season_tables(page_content):
+    if isinstance(page_content, bytes):
+        page_content = page_content.decode('utf-8')  # Wikipedia pages are always UTF-8
+    tree = lxml.html.fromstring(page_content)
+    tables = tree.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " wikitable ")]')
+    metrics.count("tables_found", len(tables))
+
+    columns = {name: [] for name in ['Nome', 'Origem', 'Data_Nascimento', 'Profissao', 'Resultado']}
+    editions = []
+    header_rows = 0
+
+    for i, table in enumerate(tables):
+
+        # Hidden elements are ignored, as pd.read_html does
+        for hidden in table.xpath('.//style|.//*[contains(translate(@style, " ", ""), "display:none")]'):
+            hidden.drop_tree()
+
+        # Line breaks separate words ('Maria<br>Clara' is 'Maria Clara'), as pd.read_html does
+        for br in table.xpath('.//br'):
+            br.tail = '\n' + (br.tail or '')
+
+        rows = table.xpath("./tr|./thead/tr|./tbody/tr|./tfoot/tr")
+        header = []
+        while rows and is_header_row(rows[0]):
+            header = expand_rows([rows.pop(0)])[0]
+            header_rows += 1
+        names = [column_names.get(text, text) for text in header]
+
+        for texts in expand_rows(rows):
+            record = dict(zip(names, texts))
+
+            # Removing headers of subsequent tables, and rows without an Origem (the old read_html + filter dropped those too)
+            origem = record.get('Origem')
+            if not origem or 'Origem' in origem:
+                header_rows += 1
+                continue
+
+            for name, text in record.items():
+                if name is None:
+                    continue
+                if name not in columns:
+                    columns[name] = [None] * len(editions)
+                columns[name].append(text or None)
+            for name, values in columns.items():
+                if len(values) == len(editions):
+                    values.append(None)
+            editions.append(f'{i+1}')
+
+    metrics.count("header_rows_skipped", header_rows)
+    contestants = pd.DataFrame(columns)
+    contestants['Edicao'] = editions
+    return contestants
 
 
 # In[5]:
@@ -83,83 +172,51 @@ contestants['Resultado'] = contestants['Resultado'].fillna(value="Em andamento e
 
 brazil_states = ['Acre','Alagoas','Amapá','Amazonas','Bahia','Ceará','Espírito Santo','Goiás','Maranhão','Mato Grosso','Mato Grosso do Sul','Minas Gerais', 'Pará','Paraíba','Paraná','Pernambuco','Piauí','Rio de Janeiro','Rio Grande do Norte','Rio Grande do Sul','Rondônia','Roraima','Santa Catarina','São Paulo','Sergipe','Tocantins','Distrito Federal']
 
-contestants['Nacionalidade'] = contestants['Origem'].apply(lambda x: 'Brasileiro' if any(sub in x for sub in brazil_states) else 'Estrangeiro')
-
-
-# In[7]:
-
-
-# Split the Origem column into City & State for Brazilians. For foreigners, it should say "Foreigner".
-
-contestants[['Cidade','Estado']] = contestants['Origem'].str.split(', ', expand=True)
-
-condition = contestants['Nacionalidade'] == 'Estrangeiro'
-contestants.loc[condition,['Cidade']] = 'Estrangeiro'
-contestants.loc[condition,['Estado']] = 'Estrangeiro'
-
-#Removing the Origem column
-
-contestants = contestants.drop(columns=['Origem'])
-
-
-# In[8]:
-
-
-#Splitting the Resultado column to show the Result and Date separately
-
-contestants[['Resultado','Data_Resultado']] = contestants['Resultado'].str.split(' em ', expand=True)
+# One precompiled alternation finds any state name in Origem for the whole column at once
+brazil_states_pattern = re.compile('|'.join(re.escape(state) for state in brazil_states))
 
 
 # In[9]:
 
 
-# Adding Gender using data from the Brazilian Census. When the names are not included in the census, it uses the gendered words in Resultado to determine Gender.
+# Deriving Nacionalidade, Cidade, Estado, Data_Resultado, Primeiro_Nome and Genero from the scraped columns
+def derive_columns(contestants, gender_index):
+    contestants = contestants.copy()
 
-# Function that makes a request to the census API and returns the gender
+    #There were nas under the Results column for the ongoing season. Replaced these with "Ongoing".
+    contestants['Resultado'] = contestants['Resultado'].fillna(value="Em andamento em Em andamento")
 
-def load_data():
+    is_brazilian = contestants['Origem'].str.contains(brazil_states_pattern, na=False)
+    contestants['Nacionalidade'] = is_brazilian.map({True: 'Brasileiro', False: 'Estrangeiro'})
 
-    url = 'https://raw.githubusercontent.com/andrea-leonel/BigBrotherBrasil_Kestra/refs/heads/main/nomes.csv'
-    response = requests.get(url)
+    # Split the Origem column into City & State for Brazilians. For foreigners, it should say "Foreigner".
+    contestants[['Cidade','Estado']] = contestants['Origem'].str.split(', ', expand=True)
 
-    if response.status_code == 200:
-        csv_data = response.text.splitlines()
-        csv_reader = csv.DictReader(csv_data)
-        data = {row["first_name"]: row["classification"] for row in csv_reader}
-        return data
-    else:
-        print("github url not accessible")
+    condition = contestants['Nacionalidade'] == 'Estrangeiro'
+    contestants.loc[condition,['Cidade']] = 'Estrangeiro'
+    contestants.loc[condition,['Estado']] = 'Estrangeiro'
 
-gender_dict = load_data()
+    #Removing the Origem column
+    contestants = contestants.drop(columns=['Origem'])
 
-# Function to extract first name from Name, uppercase it, and remove accents to match the dictionary formatting
-def get_first_name(Nome):
-    first_name = Nome.split()[0]
-    first_name = unidecode(first_name)
-    return first_name.upper()
+    #Splitting the Resultado column to show the Result and Date separately
+    contestants[['Resultado','Data_Resultado']] = contestants['Resultado'].str.split(' em ', expand=True)
 
-# Apply the function to extract first names
-contestants['Primeiro_Nome'] = contestants['Nome'].apply(get_first_name)
-contestants['Genero'] = contestants['Primeiro_Nome'].map(gender_dict)
+    # Adding Gender using data from the Brazilian Census. When the names are not included in the census, it uses the gendered words in Resultado to determine Gender.
+    # The census names are kept in a local SQLite index (see BBB_Gender_index.py), built once and queried only for the distinct first names
 
-# For the Names not included in the census, try to identify the gender based on gendered words in Resultado.
-
-# Function to determine gender based on the last letter of the Resultado column
-def determine_gender(Resultado):
-    if Resultado[-1].lower() == 'a':
-        return 'F'
-    elif Resultado[-1].lower() == 'o':
-        return 'M'
-    else:
-        return 'NA'
-
-# Apply the function only to rows where 'Gender' is NaN
-contestants['Genero'] = contestants.apply(
-    lambda row: determine_gender(row['Resultado']) if pd.isna(row['Genero']) else row['Genero'],
-    axis=1
-)
+    # Extract the first name from Name, remove accents and uppercase it to match the dictionary formatting
+    first_names = contestants['Nome'].str.split(n=1).str[0]
+    contestants['Primeiro_Nome'] = remove_accents(first_names).str.upper()
+    contestants['Genero'] = gender_index.genders(contestants['Primeiro_Nome'])
 
+    # For the Names not included in the census, try to identify the gender based on gendered words in Resultado:
+    # a Resultado ending in 'a' is female, ending in 'o' is male, anything else is 'NA'
+    resultado_gender = contestants['Resultado'].str[-1].str.lower().map({'a': 'F', 'o': 'M'}).fillna('NA')
 
+    # Only used for rows where 'Genero' is NaN
+    contestants['Genero'] = contestants['Genero'].fillna(resultado_gender)
+    return contestants
 
 
 # In[17]:
@@ -167,31 +224,40 @@ contestants['Genero'] = contestants.apply(
 
 #Normalising gendered words in Resultado
 
-contestants['Resultado'] = contestants['Resultado'].replace('Vencedora','Vencedor')
-contestants['Resultado'] = contestants['Resultado'].str.replace(r'\beliminada\b', 'eliminado', regex=True)
-contestants['Resultado'] = contestants['Resultado'].replace('Expulsa','Expulso')
-contestants['Resultado'] = contestants['Resultado'].replace('Retirada','Retirado')
-
+# Vencedora, Expulsa and Retirada are only replaced when they are the whole value, eliminada anywhere as a word
+resultado_rules = RuleSet([
+    (r'^Vencedora$', 'Vencedor'),
+    (r'\beliminada\b', 'eliminado'),
+    (r'^Expulsa$', 'Expulso'),
+    (r'^Retirada$', 'Retirado'),
+])
 
 
 # In[21]:
 
 
-# Adding the year of each contestant show
+# Normalising Resultado and Profissao and adding the year of each contestant show
+def normalise_columns(contestants, registry=None):
+    contestants = contestants.copy()
+    contestants['Resultado'] = resultado_rules.apply(contestants['Resultado'])
 
-contestants['Ano_Edicao'] = contestants['Data_Resultado'].str.slice(-4)
-contestants.loc[contestants['Data_Resultado'] == 'Em andamento', "Ano_Edicao"] = "2025"
+    contestants['Ano_Edicao'] = contestants['Data_Resultado'].str.slice(-4)
+    contestants.loc[contestants['Data_Resultado'] == 'Em andamento', "Ano_Edicao"] = "2025"
 
+    contestants['ID_Participante'] = assign_ids(contestants, registry)
 
-# In[23]:
+    contestants['Profissao'] = profissao_rules.apply(contestants['Profissao'])
+    return contestants
 
 
-# Create unique ids for the contestants
+# In[23]:
 
-unique_contestants = contestants['Nome'].unique()
-name_to_id = {name: id for id, name in enumerate(unique_contestants, start=1)}
 
-contestants['ID_Participante'] = contestants['Nome'].map(name_to_id)
+# Create unique ids for the contestants. The IDs come from the ID registry (see BBB_Changes.py), so contestants keep
+# their IDs across runs and new ones get the next free number
+def assign_ids(contestants, registry=None):
+    registry = registry or IdRegistry.load()
+    return registry.assign(contestants['Nome'])
 
 
 # In[25]:
@@ -199,71 +265,168 @@ contestants['ID_Participante'] = contestants['Nome'].map(name_to_id)
 
 #Normalising gendered words in Profissao
 
-contestants['Profissao'] = contestants['Profissao'].str.replace('endedora', 'endedor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ssessora', 'ssessor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('dvogada', 'dvogado', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Atriz', 'Ator', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('atriz', 'ator', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('arwoman', 'arman', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('iomédica', 'iomédico', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ióloga', 'iólogo', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('abeleireira', 'abeleireiro', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('antora', 'antor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('irurgiã ', 'irurgião ', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('irurgiã-', 'irurgião-', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Aeromoça', 'Comissário de voo', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('onsultora', 'onsultor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ançarina', 'ançarino', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Dona', 'Dono', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('mpresária', 'mpresário', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('nfermeira', 'nfermeiro', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ngenheira', 'ngenheiro', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Criadora de conteúdo', 'Influenciador digital', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ogadora', 'ogador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('utadora', 'utador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('aquiadora', 'aquiador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('presentadora', 'presentador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('otogirl', 'otoboy', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('édica', 'édico', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('rodutora', 'rodutor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('rofessora', 'rofessor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('outora ', 'outor ', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('romotora', 'romotor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('écnica', 'écnico', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('sicóloga', 'sicólogo', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ublicitária', 'ublicitário', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('radutora', 'radutor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('peradora', 'perador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('nfermeira', 'nfermeiro', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('youtuber', 'influenciador digital', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Youtuber', 'Influenciador digital', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('nfluenciadora digital', 'nfluenciador digital', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('posentada', 'posentado', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ducadora', 'ducador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Ginasta', 'Atleta de ginástica artística', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ailarina', 'ailarino', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('onciliadora', 'onciliador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('onfeiteira', 'onfeiteiro', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('oordenadora', 'oordenador', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('orretora', 'orretor', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Hostess', 'Host', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('ráfica', 'ráfico', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Doceira', 'Confeiteiro', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('musa', 'muso', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('grônoma', 'grônomo', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('uncionária pública', 'uncionário público', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('arota', 'aroto', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('otoqueiro', 'otoboy', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Paratleta', 'Atleta paratleta', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Surfista profissional', 'Surfista', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('Surfista', 'Atleta surfista', regex=True)
-contestants['Profissao'] = contestants['Profissao'].str.replace('eterinária', 'eterinário', regex=True)
-
+# Rules are applied in order, so a later rule also sees the output of an earlier one (e.g. 'Surfista profissional' -> 'Surfista' -> 'Atleta surfista')
+profissao_rules = RuleSet([
+    ('endedora', 'endedor'),
+    ('ssessora', 'ssessor'),
+    ('dvogada', 'dvogado'),
+    ('Atriz', 'Ator'),
+    ('atriz', 'ator'),
+    ('arwoman', 'arman'),
+    ('iomédica', 'iomédico'),
+    ('ióloga', 'iólogo'),
+    ('abeleireira', 'abeleireiro'),
+    ('antora', 'antor'),
+    ('irurgiã ', 'irurgião '),
+    ('irurgiã-', 'irurgião-'),
+    ('Aeromoça', 'Comissário de voo'),
+    ('onsultora', 'onsultor'),
+    ('ançarina', 'ançarino'),
+    ('Dona', 'Dono'),
+    ('mpresária', 'mpresário'),
+    ('nfermeira', 'nfermeiro'),
+    ('ngenheira', 'ngenheiro'),
+    ('Criadora de conteúdo', 'Influenciador digital'),
+    ('ogadora', 'ogador'),
+    ('utadora', 'utador'),
+    ('aquiadora', 'aquiador'),
+    ('presentadora', 'presentador'),
+    ('otogirl', 'otoboy'),
+    ('édica', 'édico'),
+    ('rodutora', 'rodutor'),
+    ('rofessora', 'rofessor'),
+    ('outora ', 'outor '),
+    ('romotora', 'romotor'),
+    ('écnica', 'écnico'),
+    ('sicóloga', 'sicólogo'),
+    ('ublicitária', 'ublicitário'),
+    ('radutora', 'radutor'),
+    ('peradora', 'perador'),
+    ('nfermeira', 'nfermeiro'),
+    ('youtuber', 'influenciador digital'),
+    ('Youtuber', 'Influenciador digital'),
+    ('nfluenciadora digital', 'nfluenciador digital'),
+    ('posentada', 'posentado'),
+    ('ducadora', 'ducador'),
+    ('Ginasta', 'Atleta de ginástica artística'),
+    ('ailarina', 'ailarino'),
+    ('onciliadora', 'onciliador'),
+    ('onfeiteira', 'onfeiteiro'),
+    ('oordenadora', 'oordenador'),
+    ('orretora', 'orretor'),
+    ('Hostess', 'Host'),
+    ('ráfica', 'ráfico'),
+    ('Doceira', 'Confeiteiro'),
+    ('musa', 'muso'),
+    ('grônoma', 'grônomo'),
+    ('uncionária pública', 'uncionário público'),
+    ('arota', 'aroto'),
+    ('otoqueiro', 'otoboy'),
+    ('Paratleta', 'Atleta paratleta'),
+    ('Surfista profissional', 'Surfista'),
+    ('Surfista', 'Atleta surfista'),
+    ('eterinária', 'eterinário'),
+])
+
+
+# In[26]:
+
+
+# Types of the contestants table: categories for the columns with few distinct values, small integers for season, year and ID, datetimes for the dates.
+# The Parquet schema in BBB_Output.py uses the same types.
+contestants_dtypes = {
+    'ID_Participante': 'Int32',
+    'Edicao': 'int16',
+    'Ano_Edicao': 'Int16',
+    'Genero': 'category',
+    'Nacionalidade': 'category',
+    'Cidade': 'category',
+    'Estado': 'category',
+    'Resultado': 'category',
+}
+
+# Converting the columns to their types
+def apply_schema(contestants):
+    contestants = contestants.copy()
+    contestants['Data_Nascimento'] = parse_portuguese_dates(contestants['Data_Nascimento'])
+    contestants['Data_Resultado'] = parse_portuguese_dates(contestants['Data_Resultado'])
+    contestants['Ano_Edicao'] = pd.to_numeric(contestants['Ano_Edicao'], errors='coerce')
+    contestants['Edicao'] = pd.to_numeric(contestants['Edicao'])
+    return contestants.astype(contestants_dtypes)
 
-# In[27]:
 
 
-# Save the dataframe to CSV to my local drive
+# In[27]:
 
-contestants.to_csv('Contestants.csv', index=False)
 
+# Save the dataframe into the Contestants Parquet dataset (one partition per season), to CSV, to the SQLite store and/or as a change set
+def save_contestants(contestants, output_formats=OUTPUT_FORMATS):
+    outputs = []
+
+    if 'parquet' in output_formats:
+        outputs += write_dataset('Contestants', contestants, replace=True)
+
+    # The SQLite store isn't listed in the outputs: the file changes with every season loaded into it
+    if 'sqlite' in output_formats:
+        write_table('Contestants', contestants, replace=True)
+
+    if 'csv' in output_formats:
+        contestants.to_csv('Contestants.csv', index=False)
+        outputs.append('Contestants.csv')
+
+    # Rows inserted, updated or deleted since the previous run, for incremental loads downstream
+    if 'changes' in output_formats:
+        write_changes('Contestants', contestants, replace=True)
+
+    return outputs
+
+
+# Whole pipeline for one download of the list page
+def contestants_scrape(page_content, gender_index, output_formats=OUTPUT_FORMATS, registry=None):
+    with metrics.profiled("participants"):
+        with metrics.span("html_parse"):
+            contestants = parse_season_tables(page_content)
+        with metrics.span("derivations"):
+            contestants = derive_columns(contestants, gender_index)
+        with metrics.span("normalisation"):
+            contestants = normalise_columns(contestants, registry)
+        with metrics.span("schema"):
+            contestants = apply_schema(contestants)
+        metrics.count("rows", len(contestants), table="Contestants")
+        with metrics.span("write"):
+            outputs = save_contestants(contestants, output_formats)
+    return contestants, outputs
+
+
+if __name__ == "__main__":
+    start_run("participants")
+
+    # Stop here when the page hasn't changed since the contestants data was last built (BBB_FULL_REFRESH=1 forces a rebuild)
+    manifest = Manifest.load("participants")
+    try:
+        revision = fetch_revisions([url]).get(url)
+    except Exception as e:
+        print(f"Could not check the page revision, rebuilding the contestants data: {e}")
+        revision = None
+
+    if os.environ.get("BBB_FULL_REFRESH") != "1" and not manifest.needs_refresh(url, revision):
+        print("The contestants data is up to date with the Wikipedia page")
+        metrics.count("pages_skipped")
+        finish_run()
+        sys.exit(0)
+
+    # Requesting the URL (revalidated against the local page cache)
+    with metrics.span("fetch"):
+        response = get_fetcher().get(url)
+    registry = IdRegistry.load()
+    contestants, outputs = contestants_scrape(response.content, GenderIndex(), registry=registry)
+
+    # Keeping the IDs given to new contestants for the next runs
+    registry.save()
+
+    # Recording the page revision the files were built from
+    manifest.record(url, revision, hashlib.sha256(response.content).hexdigest(), outputs)
+    manifest.save()
+
+    # Saving the stage timings and counters of this run (BBB_METRICS_PATH, default metrics/participants.json)
+    print(f"Run metrics saved to {finish_run()}")
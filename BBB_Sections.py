@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: fetching a single section of a Wikipedia page through the MediaWiki API
+# (Portuguese below)
+#
+# The nominations script only needs the table under the Histórico heading, but the rendered article is many times bigger than that table. This script asks the MediaWiki API for the list of sections of a page (a small JSON), finds the index of the Histórico section and then asks for the HTML of that section only. When the revision of the page is known (the manifest fetches the revisions of all seasons in one batched request), both requests ask for that exact revision, so their responses never change and the page cache can replay them. If the page has no Histórico section, or the API fails, the caller falls back to the full page.
+#
+# The API address is a parameter, so the functions can be pointed at a local server that replays recorded API responses (see BBB_Benchmark.py).
+#
+# Script: buscando uma única seção de uma página da Wikipedia pela API do MediaWiki
+# O script de paredões só precisa da tabela abaixo do título Histórico, mas o artigo renderizado é muitas vezes maior que essa tabela. Este script pede à API do MediaWiki a lista de seções da página (um JSON pequeno), encontra o índice da seção Histórico e então pede o HTML só dessa seção. Quando a revisão da página é conhecida (o manifesto busca as revisões de todas as edições numa única requisição em lote), as duas requisições pedem exatamente essa revisão, então as respostas nunca mudam e o cache de páginas pode reaproveitá-las. Se a página não tiver a seção Histórico, ou se a API falhar, quem chamou volta a usar a página inteira.
+#
+# O endereço da API é um parâmetro, então as funções podem apontar para um servidor local que devolve respostas da API gravadas (veja BBB_Benchmark.py).
+
+# Libraries
+
+import os
+
+from BBB_Fetch import get_fetcher
+from BBB_Manifest import API_URL, api_url, title_from_url
+
+SECTION_TITLE = "Histórico"
+
+# Where the nominations script gets the season tables from: 'api' (only the Histórico section) or 'page' (the whole article)
+SOURCES = ("api", "page")
+DEFAULT_SOURCE = os.environ.get("BBB_SOURCE", "api")
+
+
+# Parameters that select the page: the exact revision when known, otherwise the latest revision of the title
+def page_params(url, revision=None):
+    if revision is not None:
+        return {"oldid": str(revision)}
+    return {"page": title_from_url(url), "redirects": "1"}
+
+
+# Function that returns the index of the section with the given heading, or None if the page doesn't have it
+def section_index(url, fetcher=None, revision=None, title=SECTION_TITLE, api=API_URL):
+    fetcher = fetcher or get_fetcher()
+    data = fetcher.get(api_url({"action": "parse", "prop": "sections", **page_params(url, revision)}, api)).json()
+    for section in data.get("parse", {}).get("sections", []):
+        if section.get("anchor") == title or section.get("line") == title:
+            return section["index"]
+    return None
+
+
+# Function that returns the HTML of the section with the given heading (heading included), or None if the page doesn't have it
+def fetch_section_html(url, fetcher=None, revision=None, title=SECTION_TITLE, api=API_URL):
+    fetcher = fetcher or get_fetcher()
+    index = section_index(url, fetcher, revision, title, api)
+    if index is None:
+        return None
+    data = fetcher.get(api_url({"action": "parse", "prop": "text", "section": index, "disableeditsection": "1",
+                                "disablelimitreport": "1", **page_params(url, revision)}, api)).json()
+    return data.get("parse", {}).get("text")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: local SQLite store of the scraped tables
+# (Portuguese below)
+#
+# An optional output (format 'sqlite') that loads Contestants, Nominations, Individual_nominations and Eviction_results into one SQLite file with the same columns and types as the Parquet datasets (see BBB_Output.py), plus indexes on Edicao, Semana, ID_Participante and the row labels. Each season is loaded in bulk inside one transaction that replaces whatever the store had for that season, so a failed load never leaves a half-written season and loading the same season again doesn't duplicate it. Lookups like "every nomination of contestant X" (through the Name_links table, see BBB_Names.py) or "all evictions of season N" become index queries instead of reading every CSV:
+#
+#     python BBB_Store.py "SELECT * FROM Eviction_results WHERE Edicao = ?" 25
+#
+# Script: armazenamento local das tabelas extraídas em SQLite
+# Uma saída opcional (formato 'sqlite') que carrega Contestants, Nominations, Individual_nominations e Eviction_results num único arquivo SQLite com as mesmas colunas e tipos dos datasets Parquet (veja BBB_Output.py), mais índices em Edicao, Semana, ID_Participante e nos rótulos de linha. Cada edição é carregada em bloco numa única transação que substitui o que o arquivo tinha para aquela edição, então uma carga que falha nunca deixa uma edição pela metade e carregar a mesma edição de novo não a duplica. Consultas como "todas as indicações do participante X" (pela tabela Name_links, veja BBB_Names.py) ou "todas as eliminações da edição N" passam a usar índices em vez de ler todos os CSVs.
+
+# Libraries
+
+import argparse
+import os
+import sqlite3
+
+import pandas as pd
+import pyarrow as pa
+
+from BBB_Output import SCHEMAS, WEEKLY_SCHEMA
+
+DEFAULT_STORE_PATH = os.environ.get("BBB_STORE_PATH", "bbb.sqlite")
+
+# Seconds a writer waits for another one (e.g. the other scraper) to finish its transaction
+BUSY_TIMEOUT = 60
+
+# Indexes of each table, besides Edicao which every table gets
+INDEXES = {
+    "Contestants": [("ID_Participante",), ("Nome",)],
+    "Nominations": [("Edicao", "Semana"), ("Linha",), ("Valor",)],
+    "Individual_nominations": [("Edicao", "Semana"), ("Linha",), ("Valor",)],
+    "Eviction_results": [("Edicao", "Semana"), ("Linha",)],
+    "Name_links": [("Edicao", "Nome"), ("ID_Participante",)],
+}
+
+
+# SQLite type of a column of the Parquet schema (dates are stored as ISO text)
+def sqlite_type(arrow_type):
+    if pa.types.is_integer(arrow_type):
+        return "INTEGER"
+    if pa.types.is_floating(arrow_type):
+        return "REAL"
+    return "TEXT"
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def table_columns(name):
+    schema = SCHEMAS.get(name, WEEKLY_SCHEMA)
+    return [("Edicao", "INTEGER")] + [(field.name, sqlite_type(field.type)) for field in schema if field.name != "Edicao"]
+
+
+def connect(path=DEFAULT_STORE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+# Creates the table and its indexes the first time a season of it is loaded
+def create_table(conn, name):
+    columns = ", ".join(f"{quote(column)} {column_type}" for column, column_type in table_columns(name))
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(name)} ({columns})")
+    for index in [("Edicao",)] + INDEXES.get(name, []):
+        index_name = f"{name}_{'_'.join(index)}".lower()
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {quote(index_name)} ON {quote(name)} ({', '.join(map(quote, index))})")
+
+
+# Values of a table ready for SQLite: None for missing values, ISO text for dates, plain Python ints and strings
+def sqlite_rows(name, df):
+    values = {}
+    for column, column_type in table_columns(name):
+        series = df[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime("%Y-%m-%d")
+        elif column_type == "INTEGER":
+            series = series.astype("Int64")
+        values[column] = series.astype(object).where(series.notna(), None)
+    return list(zip(*(values[column].tolist() for column, _ in table_columns(name))))
+
+
+# Function that loads a table into the store, replacing each season present in the table inside its own transaction.
+# Seasons not in the table are left alone, unless replace=True, in which case the whole table is swapped in one transaction.
+def write_table(name, df, path=DEFAULT_STORE_PATH, replace=False):
+    columns = [column for column, _ in table_columns(name)]
+    insert = f"INSERT INTO {quote(name)} ({', '.join(map(quote, columns))}) VALUES ({', '.join('?' * len(columns))})"
+    conn = connect(path)
+    try:
+        with conn:
+            create_table(conn, name)
+        if replace:
+            with conn:
+                conn.execute(f"DELETE FROM {quote(name)}")
+                conn.executemany(insert, sqlite_rows(name, df))
+        else:
+            for edicao, season in df.groupby(df["Edicao"].astype(int), sort=True):
+                with conn:
+                    conn.execute(f"DELETE FROM {quote(name)} WHERE Edicao = ?", (int(edicao),))
+                    conn.executemany(insert, sqlite_rows(name, season))
+    finally:
+        conn.close()
+    return path
+
+
+# Function that runs a query against the store and returns the result as a DataFrame
+def query(sql, params=(), path=DEFAULT_STORE_PATH):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the local SQLite store of the BBB tables")
+    parser.add_argument("sql", help="SQL query, with ? for each parameter")
+    parser.add_argument("params", nargs="*", help="query parameters")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="SQLite file")
+    args = parser.parse_args()
+
+    print(query(args.sql, args.params, args.store).to_string(index=False))
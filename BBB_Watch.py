@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## Script: watching the ongoing season for new weeks
+# (Portuguese below)
+#
+# While a season is on air its Wikipedia page gets a new week every few days, and re-running the whole batch to pick it up downloads and rebuilds all 25 seasons. This script keeps running and polls only the ongoing season's page. In 'api' mode each poll is one small request for the page's revision; in 'page' mode it is a conditional GET that the server answers with 304 Not Modified when nothing changed. The table is parsed only when the page changed, compared week by week (Semana) with the last version seen, and only the new, changed or removed weeks of Nominations, Individual_nominations and Eviction_results are appended to a JSON Lines change stream. The last version seen is kept in a state file next to the stream, so a restart carries on where it stopped.
+#
+#     python BBB_Watch.py [--season 25] [--interval 300] [--once] [--save]
+#
+# Script: acompanhando a edição em andamento
+# Enquanto uma edição está no ar a sua página da Wikipedia ganha uma semana nova a cada poucos dias, e rodar o lote inteiro de novo para pegá-la baixa e reconstrói as 25 edições. Este script fica rodando e consulta só a página da edição em andamento. No modo 'api' cada consulta é uma pequena requisição pela revisão da página; no modo 'page' é um GET condicional que o servidor responde com 304 Not Modified quando nada mudou. A tabela só é lida quando a página mudou, comparada semana a semana (Semana) com a última versão vista, e só as semanas novas, alteradas ou removidas de Nominations, Individual_nominations e Eviction_results são acrescentadas a um fluxo de mudanças em JSON Lines. A última versão vista fica num arquivo de estado ao lado do fluxo, então um reinício continua de onde parou.
+
+# Libraries
+
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from BBB_Fetch import get_fetcher
+from BBB_Manifest import fetch_revisions
+from BBB_Metrics import metrics, start_run, finish_run
+from BBB_Nominations_scrape import base_url, number_of_shows, fetch_table, process_table, save_tables
+from BBB_Output import OUTPUT_FORMATS
+from BBB_Sections import DEFAULT_SOURCE, SOURCES
+
+DEFAULT_INTERVAL = int(os.environ.get("BBB_WATCH_INTERVAL", "300"))
+DEFAULT_CHANGES_DIR = os.environ.get("BBB_CHANGES_DIR", "changes")
+
+
+# Function that turns a reshaped season table into {week key: {column: value}}.
+# A week label that appears more than once gets its occurrence number in the key ('Semana 3', 'Semana 3 #2').
+def table_rows(table):
+    rows = {}
+    seen = {}
+    values = table.drop(columns="Edicao", errors="ignore")
+    for semana, row in zip(values.index, values.to_dict("records")):
+        semana = str(semana)
+        seen[semana] = seen.get(semana, 0) + 1
+        key = semana if seen[semana] == 1 else f"{semana} #{seen[semana]}"
+        rows[key] = {str(column): None if pd.isna(value) else str(value) for column, value in row.items()}
+    return rows
+
+
+# Function that compares two versions of a table's rows and lists the weeks that were inserted, updated or deleted
+def row_changes(previous, current):
+    changes = []
+    for key, row in current.items():
+        if key not in previous:
+            changes.append(("insert", key, row))
+        elif previous[key] != row:
+            changes.append(("update", key, row))
+    for key in previous:
+        if key not in current:
+            changes.append(("delete", key, None))
+    return changes
+
+
+class SeasonWatcher:
+    """Polls one season page and appends the weeks that changed since the last poll to a JSON Lines stream."""
+
+    def __init__(self, url, fetcher=None, source=DEFAULT_SOURCE, changes_dir=DEFAULT_CHANGES_DIR,
+                 output_formats=None):
+        self.url = url
+        self.year = url.rsplit('_', 1)[-1]
+        self.fetcher = fetcher or get_fetcher()
+        self.source = source
+        self.output_formats = output_formats or []
+        self.stream_path = os.path.join(changes_dir, f"nominations{self.year}.jsonl")
+        self.state_path = os.path.join(changes_dir, f"nominations{self.year}.state.json")
+        self.state = self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"revision": None, "content_sha256": None, "tables": {}}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        with open(self.state_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    # Appends the events to the stream and makes sure they are on disk before the state moves forward
+    def _append(self, events):
+        os.makedirs(os.path.dirname(self.stream_path) or ".", exist_ok=True)
+        with open(self.stream_path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # One poll: returns the events appended to the stream (an empty list when the page didn't change)
+    def poll(self):
+        metrics.count("polls")
+        with metrics.labels(season=self.year):
+            revision = None
+            if self.source == "api":
+                with metrics.span("revision_check"):
+                    revision = fetch_revisions([self.url], self.fetcher).get(self.url)
+                if revision is not None and revision == self.state["revision"]:
+                    return []
+
+            # Same content as the last poll (e.g. the page cache got a 304): nothing is parsed
+            desired_table, content_sha256 = fetch_table(self.url, self.fetcher, self.source, revision,
+                                                        self.state["content_sha256"])
+            if desired_table is None:
+                self.state["revision"] = revision
+                self._save_state()
+                return []
+
+            tables = process_table(desired_table, self.year)
+            detected_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            events = []
+            current_tables = {}
+            for name, table in tables.items():
+                current_tables[name] = table_rows(table)
+                for change, key, row in row_changes(self.state["tables"].get(name, {}), current_tables[name]):
+                    events.append({"detected_at": detected_at, "Edicao": int(self.year), "revision": revision,
+                                   "table": name, "change": change, "Semana": key, "row": row})
+            metrics.count("changes", len(events))
+
+            if events:
+                self._append(events)
+            if self.output_formats:
+                with metrics.span("write"):
+                    save_tables(tables, self.year, self.output_formats)
+
+            self.state = {"revision": revision, "content_sha256": content_sha256, "tables": current_tables}
+            self._save_state()
+            return events
+
+    # Polls every interval seconds until interrupted (or once); a failed poll is reported and retried at the next interval
+    def run(self, interval=DEFAULT_INTERVAL, once=False):
+        while True:
+            started = time.monotonic()
+            try:
+                events = self.poll()
+                if events:
+                    print(f"{len(events)} changed weeks of season {self.year} appended to {self.stream_path}")
+            except Exception as e:
+                metrics.count("poll_errors")
+                print(f"Poll of {self.url} failed: {type(e).__name__}: {e}")
+            if once:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch the ongoing BBB season and stream the weeks that change")
+    parser.add_argument("--season", type=int, default=number_of_shows, help="season to watch (default: the latest one)")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="seconds between polls")
+    parser.add_argument("--source", choices=SOURCES, default=DEFAULT_SOURCE, help="'api' checks the revision and fetches only the Histórico section, 'page' revalidates the whole article")
+    parser.add_argument("--changes-dir", default=DEFAULT_CHANGES_DIR, help="directory of the change stream and its state")
+    parser.add_argument("--save", action="store_true", help="also rewrite the season's output files when it changes")
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    args = parser.parse_args()
+    start_run("watch")
+
+    watcher = SeasonWatcher(f"{base_url}{args.season}", source=args.source, changes_dir=args.changes_dir,
+                            output_formats=OUTPUT_FORMATS if args.save else None)
+    try:
+        watcher.run(args.interval, args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Run metrics saved to {finish_run()}")
@@ -0,0 +1,35 @@
+import glob
+import os
+
+import pandas as pd
+
+from BBB_Changes import IdRegistry, write_changes
+
+
+def test_registry_keeps_ids_and_follows_normalised_names(tmp_path):
+    path = str(tmp_path / "participant_ids.json")
+    registry = IdRegistry.load(path)
+    first = registry.assign(pd.Series(["Ana Souza", "Thaís Braz", "Pedro"]))
+    assert first.tolist() == [1, 2, 3]
+    registry.save()
+
+    # A contestant added before the others doesn't renumber them, and accents, case and spacing don't make a new ID
+    registry = IdRegistry.load(path)
+    second = registry.assign(pd.Series(["Bruno Lima", "Ana Souza", "Thais  braz", "Pedro"]))
+    assert second.tolist() == [4, 1, 2, 3]
+
+
+def test_unchanged_season_writes_no_change_set_and_keeps_snapshot(tmp_path):
+    snapshots, changesets = str(tmp_path / "snapshots"), str(tmp_path / "changesets")
+    table = pd.DataFrame({"Edicao": [21, 21], "Semana": ["Semana 1", "Semana 1"], "Linha": ["Lider", "Indicados"],
+                          "Valor": ["Arthur", "Juliette"]})
+
+    written = [write_changes("Nominations", table, snapshot_dir=snapshots, changesets_dir=changesets) for _ in range(3)]
+    assert [len(paths) for paths in written] == [1, 0, 0]
+    assert os.path.exists(os.path.join(snapshots, "Nominations", "Edicao=21.parquet"))
+    assert len(glob.glob(os.path.join(changesets, "Nominations", "Edicao=21", "*.parquet"))) == 1
+
+    # A changed value is reported as an update against the kept snapshot
+    table.loc[1, "Valor"] = "Gil"
+    paths = write_changes("Nominations", table, snapshot_dir=snapshots, changesets_dir=changesets)
+    assert pd.read_parquet(paths[0])["Operacao"].tolist() == ["update"]
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from BBB_Names import NameResolver, cell_names, weekly_names
+
+# Some of the contestants of season 21, and one of season 20
+CONTESTANTS = pd.DataFrame([
+    (21, "Juliette Freire Feitosa", 1),
+    (21, "Gilberto José Nogueira Júnior", 2),
+    (21, "Arthur Picoli", 3),
+    (21, "Camilla de Lucas", 4),
+    (21, "Lucas Penteado Koka", 5),
+    (21, "Carla Diaz", 6),
+    (21, "Karoline dos Santos Oliveira", 7),
+    (21, "João Luiz Pedrosa", 8),
+    (20, "Rafaella Kalimann", 9),
+    (20, "Felipe Prior", 10),
+    (20, "Thelma Assis", 11),
+], columns=["Edicao", "Nome", "ID_Participante"])
+
+resolver = NameResolver(CONTESTANTS)
+
+
+def test_full_name_and_words():
+    assert resolver.resolve("Juliette Freire Feitosa", 21) == (1, "exact")
+    assert resolver.resolve("Juliette", 21) == (1, "tokens")
+    assert resolver.resolve("Arthur", 21) == (3, "tokens")
+
+
+def test_shortened_names():
+    assert resolver.resolve("Gil", 21) == (2, "prefix")
+    assert resolver.resolve("Karol", 21) == (7, "prefix")
+    assert resolver.resolve("Rafa", 20) == (9, "prefix")
+    # Too short to be taken as the start of a name
+    assert resolver.resolve("Ju", 21) == (None, "unresolved")
+
+
+def test_spelling_variants():
+    assert resolver.resolve("Julliette", 21) == (1, "trigrams")
+    assert resolver.resolve("Thelminha", 20) == (None, "unresolved")
+
+
+def test_ambiguous_and_other_seasons():
+    # 'Lucas' is a word of two contestants' names
+    assert resolver.resolve("Lucas", 21) == (None, "ambiguous")
+    # Contestants of other seasons are never candidates
+    assert resolver.resolve("Juliette", 20) == (None, "unresolved")
+    assert resolver.resolve("Gil", 22) == (None, "unresolved")
+
+
+def test_cell_names():
+    assert cell_names("Ana, Pedro") == ["Ana", "Pedro"]
+    assert cell_names("Ana e Pedro (3)") == ["Ana", "Pedro"]
+    assert cell_names("12") == []
+
+
+def test_weekly_names_row_labels_only_for_voters():
+    week = {"Edicao": 21, "Semana": "Semana 1"}
+    tables = {
+        "Nominations": pd.DataFrame([{**week, "Linha": "Líder", "Valor": "Arthur"}]),
+        "Individual_nominations": pd.DataFrame([{**week, "Linha": "Juliette", "Valor": "Gil, Carla"}]),
+    }
+    assert weekly_names(tables)["Nome"].tolist() == ["Arthur", "Juliette", "Gil", "Carla"]
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from BBB_Gender_index import normalise_first_name
+from BBB_Nominations_scrape import nominee_genders
+
+
+class CensusStub:
+    genders = {"JOSE": "M", "LUCIA": "F", "ANA": "F", "PEDRO": "M"}
+
+    def genders_of_names(self, names):
+        return names.map(lambda name: self.genders.get(normalise_first_name(name)))
+
+
+# Weekly tables as the scraper shapes them: one row per week, one column per row label of the page
+TABLES = {
+    "Nominations": pd.DataFrame({"Lider": ["Ana"], "Indicados": ["Jose, Lucia"], "Edicao": ["2002"]},
+                                index=pd.Index(["Semana 1"], name="Semana")),
+    "Individual_nominations": pd.DataFrame({"Pedro": ["Jose (3)"], "Ana": ["Lucia e Jose"], "Edicao": ["2002"]},
+                                           index=pd.Index(["Semana 1"], name="Semana")),
+}
+
+
+def test_nominee_genders_splits_cells_and_skips_row_labels():
+    genders = nominee_genders(TABLES, CensusStub())
+    assert sorted(genders["Nome"]) == ["Ana", "Jose", "Lucia", "Pedro"]
+    assert dict(zip(genders["Nome"], genders["Genero"])) == {"Ana": "F", "Jose": "M", "Lucia": "F", "Pedro": "M"}
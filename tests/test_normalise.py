@@ -0,0 +1,111 @@
+import re
+
+import pytest
+
+from BBB_Normalise import RuleSet
+from BBB_Participants_scrape import profissao_rules
+
+# The baseline's Profissao rules, applied one after the other with re.sub
+BASELINE_PROFISSAO_RULES = [
+    ('endedora', 'endedor'),
+    ('ssessora', 'ssessor'),
+    ('dvogada', 'dvogado'),
+    ('Atriz', 'Ator'),
+    ('atriz', 'ator'),
+    ('arwoman', 'arman'),
+    ('iomédica', 'iomédico'),
+    ('ióloga', 'iólogo'),
+    ('abeleireira', 'abeleireiro'),
+    ('antora', 'antor'),
+    ('irurgiã ', 'irurgião '),
+    ('irurgiã-', 'irurgião-'),
+    ('Aeromoça', 'Comissário de voo'),
+    ('onsultora', 'onsultor'),
+    ('ançarina', 'ançarino'),
+    ('Dona', 'Dono'),
+    ('mpresária', 'mpresário'),
+    ('nfermeira', 'nfermeiro'),
+    ('ngenheira', 'ngenheiro'),
+    ('Criadora de conteúdo', 'Influenciador digital'),
+    ('ogadora', 'ogador'),
+    ('utadora', 'utador'),
+    ('aquiadora', 'aquiador'),
+    ('presentadora', 'presentador'),
+    ('otogirl', 'otoboy'),
+    ('édica', 'édico'),
+    ('rodutora', 'rodutor'),
+    ('rofessora', 'rofessor'),
+    ('outora ', 'outor '),
+    ('romotora', 'romotor'),
+    ('écnica', 'écnico'),
+    ('sicóloga', 'sicólogo'),
+    ('ublicitária', 'ublicitário'),
+    ('radutora', 'radutor'),
+    ('peradora', 'perador'),
+    ('nfermeira', 'nfermeiro'),
+    ('youtuber', 'influenciador digital'),
+    ('Youtuber', 'Influenciador digital'),
+    ('nfluenciadora digital', 'nfluenciador digital'),
+    ('posentada', 'posentado'),
+    ('ducadora', 'ducador'),
+    ('Ginasta', 'Atleta de ginástica artística'),
+    ('ailarina', 'ailarino'),
+    ('onciliadora', 'onciliador'),
+    ('onfeiteira', 'onfeiteiro'),
+    ('oordenadora', 'oordenador'),
+    ('orretora', 'orretor'),
+    ('Hostess', 'Host'),
+    ('ráfica', 'ráfico'),
+    ('Doceira', 'Confeiteiro'),
+    ('musa', 'muso'),
+    ('grônoma', 'grônomo'),
+    ('uncionária pública', 'uncionário público'),
+    ('arota', 'aroto'),
+    ('otoqueiro', 'otoboy'),
+    ('Paratleta', 'Atleta paratleta'),
+    ('Surfista profissional', 'Surfista'),
+    ('Surfista', 'Atleta surfista'),
+    ('eterinária', 'eterinário'),
+]
+
+# Profissão values as they appear on the Wikipedia list of participants
+PROFISSOES = [
+    'Advogada', 'Advogado', 'Aeromoça', 'Agrônoma', 'Apresentadora de TV', 'Arquiteta', 'Assessora de imprensa',
+    'Atriz', 'Atriz e cantora', 'Aposentada', 'Bailarina', 'Barwoman', 'Biomédica', 'Bióloga', 'Cabeleireira',
+    'Cantora', 'Cantor e compositor', 'Cirurgiã-dentista', 'Cirurgiã plástica', 'Confeiteira', 'Consultora de moda',
+    'Coordenadora de eventos', 'Corretora de imóveis', 'Criadora de conteúdo', 'Dançarina', 'Designer gráfica',
+    'Doceira', 'Dona de casa', 'Doutora em economia', 'Educadora física', 'Empreendedora', 'Empresária',
+    'Enfermeira', 'Engenheira civil', 'Estudante', 'Funcionária pública', 'Garota de programa', 'Ginasta',
+    'Hostess', 'Influenciadora digital', 'Jogadora de vôlei', 'Jornalista', 'Lutadora de jiu-jitsu', 'Maquiadora',
+    'Médica', 'Modelo', 'Motogirl', 'Motoqueiro', 'Musa do carnaval', 'Operadora de caixa', 'Paratleta',
+    'Personal trainer', 'Produtora cultural', 'Professora', 'Promotora de vendas', 'Psicóloga', 'Publicitária',
+    'Surfista profissional', 'Técnica de enfermagem', 'Tradutora', 'Veterinária', 'Youtuber', 'Youtuber e cantora',
+]
+
+
+def apply_one_after_the_other(rules, text):
+    for pattern, replacement in rules:
+        text = re.sub(pattern, replacement, text)
+    return text
+
+
+def test_profissao_rules_match_baseline():
+    for profissao in PROFISSOES:
+        assert profissao_rules.sub(profissao) == apply_one_after_the_other(BASELINE_PROFISSAO_RULES, profissao), profissao
+
+
+def test_chains_are_resolved():
+    assert profissao_rules.sub('Surfista profissional') == 'Atleta surfista'
+    assert profissao_rules.sub('Youtuber e cantora') == 'Influenciador digital e cantor'
+
+
+def test_overlapping_matches_are_not():
+    # 'aquiadora' and 'ançarina' overlap: the single pass replaces the leftmost match only
+    text = 'aquiadorançarina'
+    assert apply_one_after_the_other(BASELINE_PROFISSAO_RULES, text) == 'aquiadornçarino'
+    assert profissao_rules.sub(text) == 'aquiadornçarina'
+
+
+def test_capturing_groups_are_rejected():
+    with pytest.raises(ValueError):
+        RuleSet([('(a)', 'b')])
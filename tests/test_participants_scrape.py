@@ -0,0 +1,53 @@
+from io import StringIO
+
+import lxml.html
+import pandas as pd
+
+from BBB_Participants_scrape import parse_season_tables
+
+HEADER = "<tr><th>Nome completo</th><th>Origem</th><th>Data de nascimento</th><th>Profissão</th><th>Resultado</th><th>Ref.</th></tr>"
+
+PAGE = f"""<html><body>
+<table class="wikitable">
+<tbody>
+{HEADER}
+<tr><td>Maria<br>Clara Souza</td><td>Recife,<br/>Pernambuco</td><td>1 de janeiro de 1990</td><td>Atriz</td><td rowspan="2">Eliminada em 5 de fevereiro de 2002</td><td>[1]</td></tr>
+<tr><td>João da Silva</td><td>Lisboa, Portugal</td><td>2 de março de 1985</td><td>Cantor<br>e compositor</td><td>[2]</td></tr>
+{HEADER}
+<tr><td>Ana Paula</td><td colspan="2">Belém, Pará</td><td>Modelo</td><td>Vencedora em 1 de abril de 2002</td><td>[3]</td></tr>
+</tbody>
+</table>
+<table class="wikitable">
+<tbody>
+<tr><th>Participantes</th><th>Origem</th><th>Data de nascimento</th><th>Profissão</th><th>Resultado</th><th>Ref.</th></tr>
+<tr><td>Pedro<br>Henrique</td><td rowspan="2">Salvador, Bahia</td><td>3 de maio de 1995</td><td>Médico</td><td>Eliminado em 2 de fevereiro de 2003</td><td>[4]</td></tr>
+<tr><td>Lúcia Maria</td><td>4 de junho de 1992</td><td>Advogada</td><td>Vencedora em 3 de abril de 2003</td><td>[5]</td></tr>
+</tbody>
+</table>
+</body></html>"""
+
+
+# The way the baseline read the tables: pd.read_html per table, concatenated, renamed and filtered
+def read_html_contestants(page):
+    dataframes = []
+    for i, table in enumerate(lxml.html.fromstring(page).xpath('//table[@class="wikitable"]')):
+        df = pd.read_html(StringIO(lxml.html.tostring(table, encoding="unicode")))[0]
+        df['Edicao'] = f'{i+1}'
+        dataframes.append(df)
+    contestants = pd.concat(dataframes, ignore_index=True)
+    contestants['Nome completo'] = contestants['Nome completo'].fillna(contestants['Participantes'])
+    contestants = contestants.rename(columns={'Nome completo': 'Nome', 'Data de nascimento': 'Data_Nascimento', 'Profissão': 'Profissao'})
+    contestants = contestants.drop(columns=['Ref.', 'Participantes'])
+    return contestants[contestants["Origem"].str.contains("Origem") == False]
+
+
+def test_parse_season_tables_matches_read_html():
+    expected = read_html_contestants(PAGE).reset_index(drop=True)
+    parsed = parse_season_tables(PAGE.encode("utf-8"))[expected.columns]
+    pd.testing.assert_frame_equal(parsed.astype(object), expected.astype(object))
+
+
+def test_line_breaks_separate_words():
+    parsed = parse_season_tables(PAGE)
+    assert parsed['Nome'].tolist() == ['Maria Clara Souza', 'João da Silva', 'Ana Paula', 'Pedro Henrique', 'Lúcia Maria']
+    assert parsed['Origem'].iloc[0] == 'Recife, Pernambuco'